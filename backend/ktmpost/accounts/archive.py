@@ -0,0 +1,70 @@
+import calendar
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import ArchiveDay, Article
+
+
+def _day(article_state):
+    if article_state is None or article_state['status'] != 'published':
+        return None
+    return article_state['category_id'], article_state['publishDate']
+
+
+def apply_change(previous, current):
+    """Move one article between day buckets as it is published, unpublished, moved or deleted."""
+    old, new = _day(previous), _day(current)
+    if old == new:
+        return
+    with transaction.atomic():
+        if old:
+            ArchiveDay.objects.filter(category_id=old[0], date=old[1]).update(articlesCount=F('articlesCount') - 1)
+        if new:
+            ArchiveDay.objects.bulk_create([ArchiveDay(category_id=new[0], date=new[1])], ignore_conflicts=True)
+            ArchiveDay.objects.filter(category_id=new[0], date=new[1]).update(articlesCount=F('articlesCount') + 1)
+
+
+def aggregate(dates=None):
+    """Published article counts as [(category id, date, count), ...], for ``dates`` or every date."""
+    articles = Article.objects.filter(status='published')
+    if dates is not None:
+        articles = articles.filter(publishDate__in=dates)
+    return list(articles.values_list('category_id', 'publishDate').annotate(n=Count('id')).order_by())
+
+
+def rebuild(dates=None):
+    """Recount the day buckets for ``dates`` (all of them by default), e.g. after bulk changes."""
+    if dates is not None and not dates:
+        return
+    rows = aggregate(dates)
+    with transaction.atomic():
+        stale = ArchiveDay.objects.all() if dates is None else ArchiveDay.objects.filter(date__in=dates)
+        stale.delete()
+        ArchiveDay.objects.bulk_create(
+            [ArchiveDay(category_id=category_id, date=day, articlesCount=n) for category_id, day, n in rows],
+            batch_size=2000,
+        )
+
+
+def calendar_counts(year=None, month=None, category_id=None):
+    """
+    Published article counts per year, per month of ``year``, or per day of
+    ``year``/``month``, read from the day buckets.
+    """
+    buckets = ArchiveDay.objects.filter(articlesCount__gt=0)
+    if category_id is not None:
+        buckets = buckets.filter(category_id=category_id)
+    if year is None:
+        rows = buckets.annotate(year=ExtractYear('date')).values_list('year').annotate(n=Sum('articlesCount'))
+        return [{'year': y, 'articlesCount': n} for y, n in rows.order_by('-year')]
+    if month is None:
+        rows = (buckets.filter(date__range=(date(year, 1, 1), date(year, 12, 31)))
+                .annotate(month=ExtractMonth('date')).values_list('month').annotate(n=Sum('articlesCount')))
+        return [{'month': m, 'articlesCount': n} for m, n in rows.order_by('month')]
+    last_day = calendar.monthrange(year, month)[1]
+    rows = (buckets.filter(date__range=(date(year, month, 1), date(year, month, last_day)))
+            .values_list('date').annotate(n=Sum('articlesCount')))
+    return [{'date': d, 'articlesCount': n} for d, n in rows.order_by('date')]
@@ -0,0 +1,153 @@
+import logging
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+
+from .models import Article, Category, Writer, WriterStats
+
+logger = logging.getLogger(__name__)
+
+STATUS_FIELDS = {'published': 'published_count', 'draft': 'draft_count', 'scheduled': 'scheduled_count'}
+# Article fields the writer aggregates depend on.
+STATE_FIELDS = ['author_id', 'category_id', 'status', 'views', 'publishDate', 'publishTime']
+TOP_CATEGORIES = 5
+
+
+def state(article):
+    """The aggregate-relevant fields of ``article``, normalized the way the database stores them."""
+    values = {name: getattr(article, name) for name in STATE_FIELDS}
+    # The publishDate/publishTime defaults leave datetimes on unsaved instances.
+    for name in ('publishDate', 'publishTime'):
+        values[name] = Article._meta.get_field(name).to_python(values[name])
+    return values
+
+
+def _latest(author_id):
+    return (Article.objects.filter(author_id=author_id, status='published')
+            .order_by('-publishDate', '-publishTime').values_list('publishDate', 'publishTime').first())
+
+
+def _apply(stats, article_state, sign):
+    """Add (sign=1) or remove (sign=-1) one article's contribution; True if the latest publish needs a lookup."""
+    field = STATUS_FIELDS.get(article_state['status'])
+    if field:
+        setattr(stats, field, getattr(stats, field) + sign)
+    stats.total_views += sign * article_state['views']
+    if article_state['status'] != 'published':
+        return False
+
+    key = str(article_state['category_id'])
+    count = stats.category_counts.get(key, 0) + sign
+    if count > 0:
+        stats.category_counts[key] = count
+    else:
+        stats.category_counts.pop(key, None)
+
+    published = (article_state['publishDate'], article_state['publishTime'])
+    latest = (stats.last_published_date, stats.last_published_time)
+    if sign > 0:
+        if latest[0] is None or published > latest:
+            stats.last_published_date, stats.last_published_time = published
+        return False
+    return published == latest
+
+
+def apply_change(previous, current):
+    """
+    Move one article's contribution to its writer's aggregates from the
+    ``previous`` state to the ``current`` one; either may be None for a
+    created or deleted article.
+    """
+    if previous == current:
+        return
+    author_ids = sorted({s['author_id'] for s in (previous, current) if s})
+    with transaction.atomic():
+        for author_id in author_ids:
+            adding = current is not None and current['author_id'] == author_id
+            if adding:
+                stats, _ = WriterStats.objects.select_for_update().get_or_create(writer_id=author_id)
+            else:
+                stats = WriterStats.objects.select_for_update().filter(writer_id=author_id).first()
+                if stats is None:
+                    continue
+            stale = False
+            if previous is not None and previous['author_id'] == author_id:
+                stale = _apply(stats, previous, -1)
+            if adding:
+                _apply(stats, current, 1)
+            if stale:
+                stats.last_published_date, stats.last_published_time = _latest(author_id) or (None, None)
+            stats.save()
+
+
+def add_views(article_views):
+    """Add view counts ({article id: views}) to the writers' totals, one UPDATE per writer."""
+    by_author = Counter()
+    for pk, author_id in Article.objects.filter(pk__in=list(article_views)).values_list('pk', 'author_id'):
+        by_author[author_id] += article_views[pk]
+    for author_id, views in by_author.items():
+        WriterStats.objects.filter(writer_id=author_id).update(total_views=F('total_views') + views)
+
+
+def aggregate(writer_ids=None):
+    """Writer aggregates computed from scratch as {writer id: WriterStats field values}."""
+    writers = Writer.objects.all()
+    articles = Article.objects.all()
+    if writer_ids is not None:
+        writers = writers.filter(pk__in=writer_ids)
+        articles = articles.filter(author_id__in=writer_ids)
+
+    rows = defaultdict(lambda: {
+        'published_count': 0, 'draft_count': 0, 'scheduled_count': 0, 'total_views': 0,
+        'last_published_date': None, 'last_published_time': None, 'category_counts': {},
+    })
+    by_status = (articles.values_list('author_id', 'status')
+                 .annotate(n=Count('id'), views=Sum('views')).order_by())
+    for author_id, status, n, views in by_status:
+        row = rows[author_id]
+        if status in STATUS_FIELDS:
+            row[STATUS_FIELDS[status]] = n
+        row['total_views'] += views or 0
+    by_category = (articles.filter(status='published').values_list('author_id', 'category_id')
+                   .annotate(n=Count('id')).order_by())
+    for author_id, category_id, n in by_category:
+        rows[author_id]['category_counts'][str(category_id)] = n
+
+    latest = (Article.objects.filter(author=OuterRef('pk'), status='published')
+              .order_by('-publishDate', '-publishTime'))
+    writers = writers.annotate(
+        last_date=Subquery(latest.values('publishDate')[:1]),
+        last_time=Subquery(latest.values('publishTime')[:1]),
+    )
+    for pk, last_date, last_time in writers.values_list('pk', 'last_date', 'last_time'):
+        rows[pk].update(last_published_date=last_date, last_published_time=last_time)
+    return dict(rows)
+
+
+def rebuild(writer_ids=None):
+    """Recompute WriterStats for ``writer_ids`` (all writers by default), e.g. after bulk loads."""
+    rows = aggregate(writer_ids)
+    with transaction.atomic():
+        WriterStats.objects.filter(writer_id__in=list(rows)).delete()
+        WriterStats.objects.bulk_create(
+            [WriterStats(writer_id=pk, **values) for pk, values in rows.items()], batch_size=1000
+        )
+    logger.info(f"Rebuilt article aggregates for {len(rows)} writers")
+    return len(rows)
+
+
+def profile_stats(writer):
+    """Aggregates shown on the author page, read from WriterStats (zeros if not computed yet)."""
+    stats = WriterStats.objects.filter(writer=writer).first() or WriterStats(writer=writer)
+    top = sorted(stats.category_counts.items(), key=lambda item: (-item[1], int(item[0])))[:TOP_CATEGORIES]
+    names = dict(Category.objects.filter(pk__in=[int(pk) for pk, _ in top]).values_list('pk', 'name'))
+    return {
+        'articles': {status: getattr(stats, field) for status, field in STATUS_FIELDS.items()},
+        'totalViews': stats.total_views,
+        'lastPublishDate': stats.last_published_date,
+        'lastPublishTime': stats.last_published_time,
+        'topCategories': [
+            {'id': int(pk), 'name': names.get(int(pk), ''), 'articlesCount': n} for pk, n in top
+        ],
+    }
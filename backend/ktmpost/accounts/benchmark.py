@@ -0,0 +1,318 @@
+import io
+import json
+import os
+import random
+import secrets
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from django.db import connection, connections, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import archive, authors, related, revisions, taxonomy
+from .models import Article, ArticleTag, Category, CustomUser, Video, VideoCategory, Writer
+
+BENCH_USERNAME = 'benchmark'
+
+NEPALI_WORDS = [
+    'नेपाल', 'सरकार', 'काठमाडौं', 'निर्वाचन', 'संसद', 'प्रधानमन्त्री', 'अर्थतन्त्र', 'बजेट',
+    'विकास', 'सडक', 'शिक्षा', 'स्वास्थ्य', 'खेलकुद', 'क्रिकेट', 'फुटबल', 'मौसम', 'वर्षा',
+    'बाढी', 'पहिरो', 'पर्यटन', 'हिमाल', 'किसान', 'बजार', 'मूल्य', 'विद्यार्थी', 'अस्पताल',
+    'प्रदेश', 'नगरपालिका', 'अदालत', 'प्रहरी', 'समाचार', 'आज', 'भन्यो', 'गरेको', 'छ', 'थियो',
+]
+
+
+def nepali_text(rng, words):
+    return ' '.join(rng.choice(NEPALI_WORDS) for _ in range(words))
+
+
+def seed(articles=100000, writers=2000, categories=1000, videos=2000, batch_size=2000, seed_value=42,
+         related_sample=1000, stdout=None):
+    """Populate the database with a reproducible, realistically sized data set."""
+    rng = random.Random(seed_value)
+    log = stdout.write if stdout else (lambda msg: None)
+
+    user, _ = CustomUser.objects.get_or_create(
+        username=BENCH_USERNAME, defaults={'is_staff': True, 'is_superuser': True, 'role': 'admin'}
+    )
+    # Never a known password: each benchmark run sets its own for the login scenario.
+    user.set_password(secrets.token_urlsafe(32))
+    user.save()
+
+    Category.objects.bulk_create([
+        Category(
+            name=nepali_text(rng, 2), nameEnglish=f'Category {i}', description=nepali_text(rng, 20),
+            subcategories=[nepali_text(rng, 1) for _ in range(rng.randint(0, 6))], order=i,
+        )
+        for i in range(categories)
+    ], batch_size=batch_size)
+    log(f'Seeded {categories} categories\n')
+
+    Writer.objects.bulk_create([
+        Writer(
+            name=nepali_text(rng, 2), email=f'writer{i}-{seed_value}@bench.ktmpost', role='Reporter',
+            department='News', bio=nepali_text(rng, 30), expertise=[nepali_text(rng, 1)],
+        )
+        for i in range(writers)
+    ], batch_size=batch_size)
+    log(f'Seeded {writers} writers\n')
+
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    writer_ids = list(Writer.objects.values_list('id', flat=True))
+    start = date.today() - timedelta(days=3650)
+    statuses = ['published'] * 8 + ['draft', 'scheduled']
+
+    for offset in range(0, articles, batch_size):
+        batch = []
+        for _ in range(min(batch_size, articles - offset)):
+            paragraphs = ''.join(f'<p>{nepali_text(rng, rng.randint(40, 120))}</p>' for _ in range(rng.randint(3, 12)))
+            batch.append(Article(
+                title=nepali_text(rng, rng.randint(5, 12)), excerpt=nepali_text(rng, 30), content=paragraphs,
+                category_id=rng.choice(category_ids), author_id=rng.choice(writer_ids),
+                tags=[nepali_text(rng, 1) for _ in range(rng.randint(0, 5))], status=rng.choice(statuses),
+                isHot=rng.random() < 0.02, isTrending=rng.random() < 0.02, isBreaking=rng.random() < 0.01,
+                publishDate=start + timedelta(days=rng.randint(0, 3650)),
+                publishTime=datetime.min.time().replace(hour=rng.randint(0, 23), minute=rng.randint(0, 59)),
+                views=rng.randint(0, 50000),
+            ))
+            # bulk_create skips Article.save(), which renders contentHtml and the read time.
+            batch[-1].process_content()
+        Article.objects.bulk_create(batch)
+        log(f'Seeded {offset + len(batch)}/{articles} articles\n')
+
+    # bulk_create bypasses Article.save(), so recompute the denormalized counters once.
+    for row in Article.objects.values('category_id').annotate(n=Count('id')):
+        Category.objects.filter(pk=row['category_id']).update(articlesCount=row['n'])
+    for row in Article.objects.values('author_id').annotate(n=Count('id')):
+        Writer.objects.filter(pk=row['author_id']).update(articles_count=row['n'])
+
+    tag_rows = []
+    for pk, tags in Article.objects.values_list('pk', 'tags').iterator(chunk_size=batch_size):
+        tag_rows.extend(ArticleTag(article_id=pk, name=name) for name in taxonomy.clean_tags(tags))
+        if len(tag_rows) >= batch_size:
+            ArticleTag.objects.bulk_create(tag_rows, ignore_conflicts=True)
+            tag_rows = []
+    ArticleTag.objects.bulk_create(tag_rows, ignore_conflicts=True)
+    taxonomy.rebuild()
+    authors.rebuild()
+    archive.rebuild()
+    recent = list(Article.objects.order_by('-pk').values_list('pk', flat=True)[:related_sample])
+    related.rebuild(Article.objects.filter(pk__in=recent))
+    log(f'Indexed tags and related articles for the {len(recent)} most recent articles\n')
+
+    video_category = VideoCategory.objects.create(name='समाचार')
+    Video.objects.bulk_create([
+        Video(
+            title=nepali_text(rng, 6), description=nepali_text(rng, 20), category=video_category,
+            uploader=user, status=rng.choice(['draft', 'published', 'archived']), views=rng.randint(0, 10000),
+        )
+        for _ in range(videos)
+    ], batch_size=batch_size)
+    log(f'Seeded {videos} videos\n')
+
+
+# A 1x1 transparent PNG, used for upload scenarios.
+PNG_BYTES = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c4'
+    '890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+
+def default_scenarios(password):
+    """
+    Return (name, method, path, data) tuples; path may be a callable taking an
+    RNG. ``password`` is the benchmark user's, for the login scenario.
+    """
+    article_ids = list(Article.objects.order_by('-pk').values_list('id', flat=True)[:1000])
+    category_ids = list(Category.objects.values_list('id', flat=True)[:100])
+    video_ids = list(Video.objects.values_list('id', flat=True)[:100])
+    scenarios = [
+        ('article-list', 'get', '/api/articles/', None),
+        ('category-list', 'get', '/api/categories/', None),
+        ('video-list', 'get', '/api/videos/', None),
+        ('article-stats', 'get', '/api/article-stats/', None),
+        ('login', 'post', '/api/login/', {'username': BENCH_USERNAME, 'password': password}),
+        ('upload', 'post', '/api/upload/', 'upload'),
+    ]
+    if article_ids:
+        scenarios.append(('article-detail', 'get', lambda rng: f'/api/articles/{rng.choice(article_ids)}/', None))
+        scenarios.append(('article-related', 'get', lambda rng: f'/api/articles/{rng.choice(article_ids)}/related/', None))
+    if category_ids:
+        scenarios.append(('category-detail', 'get', lambda rng: f'/api/categories/{rng.choice(category_ids)}/', None))
+    if video_ids:
+        scenarios.append(('video-detail', 'get', lambda rng: f'/api/videos/{rng.choice(video_ids)}/', None))
+    return scenarios
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _run_one(client, rng, method, path, data):
+    url = path(rng) if callable(path) else path
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        if data == 'upload':
+            upload = io.BytesIO(PNG_BYTES)
+            upload.name = 'benchmark.png'
+            response = client.post(url, {'file': upload})
+        elif method == 'post':
+            response = client.post(url, data, content_type='application/json')
+        else:
+            response = client.get(url)
+        if response.streaming:
+            # Streamed bodies run their queries while being consumed.
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+    if data == 'upload' and response.status_code == 200:
+        # Don't let repeated runs fill media/uploads with benchmark files.
+        saved = response.json()['url'].lstrip('/')
+        if os.path.exists(saved):
+            os.remove(saved)
+    return elapsed, len(ctx.captured_queries), response.status_code < 400
+
+
+def run_scenario(method, path, data, requests, concurrency, token, seed_value=42):
+    def worker(worker_id, count):
+        client = Client(SERVER_NAME='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+        rng = random.Random(seed_value + worker_id)
+        try:
+            return [_run_one(client, rng, method, path, data) for _ in range(count)]
+        finally:
+            if concurrency > 1:
+                connections.close_all()
+
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    if concurrency == 1:
+        results = worker(0, requests)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = [r for chunk in pool.map(worker, range(concurrency), shares) for r in chunk]
+    wall = time.perf_counter() - start
+
+    latencies = [r[0] * 1000 for r in results]
+    return {
+        'requests': len(results),
+        'concurrency': concurrency,
+        'errors': sum(1 for r in results if not r[2]),
+        'throughput_rps': round(len(results) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries_avg': round(statistics.mean(r[1] for r in results), 2) if results else 0.0,
+    }
+
+
+def revision_growth(edits=20, seed_value=42):
+    """
+    Apply small edits to one article and measure how much revision history
+    each edit adds. Runs in a transaction that is rolled back afterwards.
+    """
+    rng = random.Random(seed_value)
+    article = Article.objects.filter(status='published').order_by('-pk').first()
+    if article is None:
+        return None
+    with transaction.atomic():
+        revisions.ensure_baseline(article)
+        before = revisions.storage_size(article.pk)
+        for _ in range(edits):
+            words = article.content.split(' ')
+            words[rng.randrange(len(words))] = nepali_text(rng, 1)
+            article.content = ' '.join(words)
+            article.save()
+            last = revisions.record(article)
+        growth = revisions.storage_size(article.pk) - before
+        start = time.perf_counter()
+        revisions.rebuild_content(article.pk, last.number)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        transaction.set_rollback(True)
+    return {
+        'edits': edits,
+        'content_bytes': len(article.content.encode('utf-8')),
+        'bytes_per_edit': round(growth / edits, 1),
+        'rebuild_latest_ms': round(rebuild_ms, 3),
+    }
+
+
+def run(requests=100, concurrency=4, only=None, scenarios=None, rate_limits=False, stdout=None):
+    """
+    Drive every scenario and return a JSON-serializable baseline report.
+    Rate limiting is off unless ``rate_limits`` is set, since a single client
+    would otherwise exhaust the login and upload budgets.
+    """
+    with override_settings(RATE_LIMIT_ENABLED=rate_limits):
+        return _run(requests, concurrency, only, scenarios, stdout)
+
+
+def _run(requests, concurrency, only, scenarios, stdout):
+    user = CustomUser.objects.get(username=BENCH_USERNAME)
+    password = secrets.token_urlsafe(32)
+    user.set_password(password)
+    user.save(update_fields=['password'])
+    token = str(RefreshToken.for_user(user).access_token)
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'articles': Article.objects.count(),
+            'writers': Writer.objects.count(),
+            'categories': Category.objects.count(),
+            'videos': Video.objects.count(),
+        },
+        'scenarios': {},
+    }
+    if not only or 'revisions' in only:
+        report['revisions'] = revision_growth()
+        if stdout and report['revisions']:
+            stdout.write(f"revisions          {report['revisions']['bytes_per_edit']} bytes/edit for "
+                         f"{report['revisions']['content_bytes']} byte body, rebuild "
+                         f"{report['revisions']['rebuild_latest_ms']} ms\n")
+    for name, method, path, data in scenarios or default_scenarios(password):
+        if only and name not in only:
+            continue
+        result = run_scenario(method, path, data, requests, concurrency, token)
+        report['scenarios'][name] = result
+        if stdout:
+            stdout.write(
+                f"{name:<18} {result['throughput_rps']:>9} rps  p50 {result['p50_ms']:>9} ms  "
+                f"p95 {result['p95_ms']:>9} ms  p99 {result['p99_ms']:>9} ms  "
+                f"queries {result['queries_avg']:>6}  errors {result['errors']}\n"
+            )
+    return report
+
+
+def compare(baseline, current, threshold=0.10):
+    """Return human-readable regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_avg'):
+            if before[key] and result[key] > before[key] * (1 + threshold):
+                regressions.append(f'{name}: {key} {before[key]} -> {result[key]}')
+        if before['throughput_rps'] and result['throughput_rps'] < before['throughput_rps'] * (1 - threshold):
+            regressions.append(f"{name}: throughput_rps {before['throughput_rps']} -> {result['throughput_rps']}")
+    before, after = baseline.get('revisions'), current.get('revisions')
+    if before and after and after['bytes_per_edit'] > before['bytes_per_edit'] * (1 + threshold):
+        regressions.append(f"revisions: bytes_per_edit {before['bytes_per_edit']} -> {after['bytes_per_edit']}")
+    return regressions
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
@@ -0,0 +1,241 @@
+import json
+import logging
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, Value, When
+from django.utils import timezone
+
+from . import archive, authors, category_tree, purge, related, taxonomy
+from .feeds import invalidate_feeds
+from .models import Article, Category, RelatedArticle, Subcategory, Writer
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ['title', 'content', 'category', 'author']
+OPTIONAL_FIELDS = [
+    'excerpt', 'subcategory', 'featuredImage', 'gallery', 'tags', 'status', 'isFeatured', 'isHot',
+    'isTrending', 'isBreaking', 'publishDate', 'publishTime', 'seoTitle', 'seoDescription',
+    'seoKeywords', 'readTime', 'views',
+]
+EXPORT_FIELDS = ['id', 'category_id', 'author_id'] + [
+    f for f in REQUIRED_FIELDS + OPTIONAL_FIELDS if f not in ('category', 'author')
+] + ['createdAt', 'updatedAt']
+MAX_FEATURED = 3
+# Fields editors may change on many articles at once.
+BULK_UPDATE_FIELDS = ['status', 'isFeatured', 'isHot', 'isTrending', 'isBreaking']
+MAX_BULK_IDS = 1000
+
+
+def build_article(row, categories, subcategories, writer_ids):
+    """Turn one decoded NDJSON row into an unsaved Article, raising ValidationError if invalid."""
+    if not isinstance(row, dict):
+        raise ValidationError('Each line must be a JSON object.')
+    for name in REQUIRED_FIELDS:
+        if not row.get(name):
+            raise ValidationError(f'{name} is required.')
+    category = categories.get(row['category']) if isinstance(row['category'], int) else None
+    if category is None:
+        raise ValidationError(f"Category {row['category']} does not exist.")
+    if not isinstance(row['author'], int) or row['author'] not in writer_ids:
+        raise ValidationError(f"Writer {row['author']} does not exist.")
+    if row.get('subcategory') and (category.pk, row['subcategory']) not in subcategories:
+        raise ValidationError(f"Subcategory '{row['subcategory']}' is not valid for category '{category.name}'.")
+    if row.get('status', 'draft') not in dict(Article.STATUS_CHOICES):
+        raise ValidationError(f"Invalid status '{row['status']}'.")
+
+    values = {}
+    for name in ['title', 'content'] + OPTIONAL_FIELDS:
+        if name not in row:
+            continue
+        field = Article._meta.get_field(name)
+        if row[name] is None and field.blank and not field.null:
+            # Optional text fields sent as null keep their default ('' for an excerpt to be derived).
+            continue
+        values[name] = field.to_python(row[name])
+    article = Article(category_id=category.pk, author_id=row['author'], **values)
+    # Enforces null, max_length and choices before anything reaches the database.
+    article.clean_fields(exclude=['category', 'author', 'contentHtml'])
+    article.process_content()
+    return article
+
+
+def _error_message(error):
+    if not isinstance(error, ValidationError):
+        return str(error)
+    if hasattr(error, 'error_dict'):
+        return '; '.join(f'{field}: {message}' for field, messages in error.message_dict.items() for message in messages)
+    return '; '.join(error.messages)
+
+
+def _refresh_counters(category_ids, writer_ids):
+    """Recompute the denormalized article counters of the given categories and writers."""
+    counts = dict(Article.objects.filter(category_id__in=category_ids).values_list('category_id').annotate(Count('id')))
+    for pk in category_ids:
+        Category.objects.filter(pk=pk).update(articlesCount=counts.get(pk, 0))
+    counts = dict(Article.objects.filter(author_id__in=writer_ids).values_list('author_id').annotate(Count('id')))
+    for pk in writer_ids:
+        Writer.objects.filter(pk=pk).update(articles_count=counts.get(pk, 0))
+
+
+def _enforce_featured_limit():
+    keep = list(Article.objects.filter(isFeatured=True).order_by('-updatedAt').values_list('pk', flat=True)[:MAX_FEATURED])
+    Article.objects.filter(isFeatured=True).exclude(pk__in=keep).update(isFeatured=False)
+
+
+def _assign_pks(batch, after):
+    """
+    Fill in the primary keys bulk_create leaves unset on MySQL. The rows went in
+    in batch order, so walk the ids above ``after`` upwards, skipping any an
+    insert from another connection interleaved.
+    """
+    pending = iter(batch)
+    article = next(pending)
+    rows = Article.objects.filter(pk__gt=after).order_by('pk').values_list('pk', 'title', 'category_id', 'author_id')
+    for pk, title, category_id, author_id in rows.iterator():
+        if (title, category_id, author_id) == (article.title, article.category_id, article.author_id):
+            article.pk = pk
+            article._state.adding = False
+            article = next(pending, None)
+            if article is None:
+                return
+
+
+def _flush(batch):
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Article.objects.bulk_create(batch)
+        else:
+            after = Article.objects.aggregate(last=Max('pk'))['last'] or 0
+            Article.objects.bulk_create(batch)
+            _assign_pks(batch, after)
+        _refresh_counters({a.category_id for a in batch}, {a.author_id for a in batch})
+        authors.rebuild({a.author_id for a in batch})
+        archive.rebuild({related.as_date(a.publishDate) for a in batch if a.status == 'published'})
+        if any(a.isFeatured for a in batch):
+            _enforce_featured_limit()
+        for article in batch:
+            related.index_article(article)
+    invalidate_feeds({a.category_id for a in batch})
+    purge.purge(['home'] + [f'category:{pk}' for pk in {a.category_id for a in batch}])
+    if any(a.status == 'published' for a in batch):
+        category_tree.invalidate()
+
+
+def import_ndjson(lines, batch_size=1000):
+    """
+    Import articles from an iterable of NDJSON lines (str or bytes) in batches.
+    Invalid lines are skipped and reported; returns (created_count, errors).
+    """
+    categories = {c.pk: c for c in Category.objects.only('id', 'name')}
+    subcategories = set(Subcategory.objects.values_list('category_id', 'name'))
+    writer_ids = set(Writer.objects.values_list('id', flat=True))
+    created = 0
+    errors = []
+    batch = []
+    for line_number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            batch.append(build_article(json.loads(line), categories, subcategories, writer_ids))
+        except (TypeError, ValueError, ValidationError) as e:
+            errors.append({'line': line_number, 'error': _error_message(e)})
+            continue
+        if len(batch) >= batch_size:
+            _flush(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        _flush(batch)
+        created += len(batch)
+    logger.info(f"Bulk import created {created} articles, {len(errors)} lines rejected")
+    return created, errors
+
+
+def export_ndjson(chunk_size=2000):
+    """Yield every article as one NDJSON line, reading the table in chunks."""
+    queryset = Article.objects.order_by('pk').values(*EXPORT_FIELDS)
+    for row in queryset.iterator(chunk_size=chunk_size):
+        row['category'] = row.pop('category_id')
+        row['author'] = row.pop('author_id')
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _check_ids(ids):
+    if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise ValidationError('ids must be a non-empty list of integers.')
+    if len(ids) > MAX_BULK_IDS:
+        raise ValidationError(f'At most {MAX_BULK_IDS} ids per request.')
+    if len(set(ids)) != len(ids):
+        raise ValidationError('ids must not repeat.')
+
+
+def update_articles(ids, changes):
+    """
+    Apply flag and status ``changes`` to the articles in ``ids`` with one UPDATE,
+    skipping Article.save(). Feeds, the category tree and the related index are
+    refreshed once for the whole batch. Returns the number of articles updated.
+    """
+    _check_ids(ids)
+    if not isinstance(changes, dict) or not changes:
+        raise ValidationError('changes must be a non-empty object.')
+    unknown = sorted(set(changes) - set(BULK_UPDATE_FIELDS))
+    if unknown:
+        raise ValidationError(f"Fields that can't be changed in bulk: {', '.join(unknown)}.")
+    values = {name: Article._meta.get_field(name).to_python(value) for name, value in changes.items()}
+    if 'status' in values and values['status'] not in dict(Article.STATUS_CHOICES):
+        raise ValidationError(f"Invalid status '{values['status']}'.")
+
+    with transaction.atomic():
+        queryset = Article.objects.filter(pk__in=ids)
+        rows = list(queryset.select_for_update().values('pk', 'author_id', 'category_id', 'status', 'publishDate', 'tags'))
+        updated = queryset.update(updatedAt=timezone.now(), **values)
+        if values.get('isFeatured'):
+            _enforce_featured_limit()
+        # Articles whose status actually changed, with the status they had.
+        moved = {
+            row['pk']: row['status'] for row in rows if 'status' in values and row['status'] != values['status']
+        }
+        if moved and values['status'] == 'published':
+            for article in Article.objects.filter(pk__in=moved).only(*related.CANDIDATE_FIELDS):
+                related.update_article(article)
+        elif moved:
+            RelatedArticle.objects.filter(Q(article_id__in=moved) | Q(related_id__in=moved)).delete()
+        if moved:
+            # Tags count published articles only.
+            tags = [name for row in rows if row['pk'] in moved and 'published' in (moved[row['pk']], values['status'])
+                    for name in taxonomy.clean_tags(row['tags'])]
+            if values['status'] == 'published':
+                taxonomy.adjust_tag_counts(added=tags)
+            else:
+                taxonomy.adjust_tag_counts(removed=tags)
+            authors.rebuild({row['author_id'] for row in rows if row['pk'] in moved})
+            archive.rebuild({row['publishDate'] for row in rows if row['pk'] in moved})
+
+    invalidate_feeds({row['category_id'] for row in rows})
+    purge.purge(
+        ['home'] + [f"article:{row['pk']}" for row in rows] + [f"category:{row['category_id']}" for row in rows]
+    )
+    if moved and (values['status'] == 'published' or 'published' in moved.values()):
+        category_tree.invalidate()
+    logger.info(f"Bulk update of {updated} articles: {values}")
+    return updated
+
+
+def reorder_categories(ids):
+    """Set Category.order to each id's position in ``ids`` (starting at 1) with one UPDATE."""
+    _check_ids(ids)
+    missing = set(ids) - set(Category.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    if missing:
+        raise ValidationError(f"Categories not found: {', '.join(str(pk) for pk in sorted(missing))}.")
+    Category.objects.filter(pk__in=ids).update(order=Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids, start=1)],
+        output_field=IntegerField(),
+    ))
+    category_tree.invalidate()
+    invalidate_feeds(ids)
+    purge.purge(['home'])
+    logger.info(f"Reordered {len(ids)} categories")
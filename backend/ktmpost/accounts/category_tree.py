@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from . import compression
+from .models import Article, Category, Subcategory
+
+VERSION_KEY = 'category_tree:version'
+
+
+def build():
+    """Active categories in navigation order, each with its subcategories and published article counts."""
+    category_counts = dict(
+        Article.objects.filter(status='published').values_list('category_id').annotate(n=Count('id')).order_by()
+    )
+    subcategory_counts = {
+        (category_id, name): n for category_id, name, n in
+        Article.objects.filter(status='published').exclude(subcategory='')
+        .values_list('category_id', 'subcategory').annotate(n=Count('id')).order_by()
+    }
+    subcategories = {}
+    for category_id, name in Subcategory.objects.order_by('category_id', 'order').values_list('category_id', 'name'):
+        subcategories.setdefault(category_id, []).append(
+            {'name': name, 'articlesCount': subcategory_counts.get((category_id, name), 0)}
+        )
+    return [
+        {
+            'id': category.pk,
+            'name': category.name,
+            'nameEnglish': category.nameEnglish,
+            'description': category.description,
+            'color': category.color,
+            'icon': category.icon,
+            'order': category.order,
+            'articlesCount': category_counts.get(category.pk, 0),
+            'subcategories': subcategories.get(category.pk, []),
+        }
+        for category in Category.objects.filter(isActive=True).order_by('order', 'pk')
+    ]
+
+
+def current_version():
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def invalidate():
+    """
+    Drop the memoized tree in every process once the current transaction
+    commits; each one rebuilds it on its next request.
+    """
+    def bump():
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 2, None)
+        tree.clear()
+
+    transaction.on_commit(bump)
+
+
+class CategoryTree:
+    """
+    The serialized category tree, memoized in process memory together with its
+    compressed variants and their ETags.
+
+    The memo is tagged with a version number kept in the shared cache, so a
+    change saved through any worker invalidates the tree in all of them at the
+    cost of one cache read per request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._variants = {}
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._variants = {}
+
+    def get(self, encoding=None):
+        """(body, ETag, encoding) of the tree, compressed with ``encoding`` when it's worth it."""
+        version = current_version()
+        with self._lock:
+            variants = self._variants if self._version == version else {}
+            if encoding in variants:
+                return variants[encoding]
+            plain = variants.get(None)
+
+        if plain is None:
+            body = json.dumps(build(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            plain = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', None)
+        result = plain
+        if encoding is not None and len(plain[0]) >= getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            # Each encoding is its own representation, so it gets its own strong ETag.
+            result = (compression.compress(plain[0], encoding), f'{plain[1][:-1]}-{encoding}"', encoding)
+
+        with self._lock:
+            if self._version != version:
+                self._version, self._variants = version, {}
+            self._variants[None] = plain
+            self._variants[encoding] = result
+        return result
+
+
+tree = CategoryTree()
@@ -0,0 +1,150 @@
+import gzip
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/xml', 'application/rss+xml', 'application/atom+xml',
+    'application/x-ndjson', 'text/',
+)
+
+
+def _gzip_stream():
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _brotli_stream():
+    compressor = brotli.Compressor(quality=5)
+    return compressor.process, compressor.finish
+
+
+def _zstd_stream():
+    compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    return compressor.compress, compressor.flush
+
+
+# Encoding -> (one-shot compress, incremental compressor factory), in server preference order.
+ENCODERS = {}
+if brotli is not None:
+    ENCODERS['br'] = (lambda data: brotli.compress(data, quality=5), _brotli_stream)
+if zstandard is not None:
+    ENCODERS['zstd'] = (lambda data: zstandard.ZstdCompressor(level=3).compress(data), _zstd_stream)
+ENCODERS['gzip'] = (lambda data: gzip.compress(data, compresslevel=6, mtime=0), _gzip_stream)
+
+
+def negotiate(accept_encoding):
+    """Pick the preferred encoding the client accepts, or None for identity."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODERS:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    return ENCODERS[encoding][0](body)
+
+
+def _compress_stream(chunks, encoding):
+    process, finish = ENCODERS[encoding][1]()
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def _set_encoding_headers(response, encoding):
+    response.headers['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        # The body changed, so a strong validator would no longer be accurate.
+        response.headers['ETag'] = 'W/' + etag
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli, zstd or gzip, whichever the client accepts
+    and is installed. Bodies under COMPRESSION_MIN_SIZE bytes are sent as is.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or not self._compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = _compress_stream(response.streaming_content, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            if len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        _set_encoding_headers(response, encoding)
+        return response
+
+    def _compressible(self, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        return response.status_code == 200 and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def cached_response(request, key, build, content_type, timeout=None):
+    """
+    Serve a cached body, storing each negotiated compressed variant next to the
+    plain one so repeated hits never compress the same payload again.
+    ``build`` returns the plain body as bytes and is only called on a miss.
+    """
+    encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    variant_key = f'{key}:{encoding}'
+    compressed = cache.get(variant_key) if encoding is not None else None
+    body = None
+    if compressed is None:
+        body = cache.get(key)
+        if body is None:
+            body = build()
+            cache.set(key, body, timeout)
+        if encoding is not None and len(body) >= getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            compressed = compress(body, encoding)
+            cache.set(variant_key, compressed, timeout)
+    if compressed is not None:
+        response = HttpResponse(compressed, content_type=content_type)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,203 @@
+import math
+import re
+from collections import namedtuple
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+
+# Tag -> attributes kept on it. Anything else is dropped, keeping its text.
+ALLOWED_TAGS = {
+    'p': (), 'br': (), 'hr': (), 'div': (), 'span': (),
+    'h2': (), 'h3': (), 'h4': (), 'h5': (), 'h6': (),
+    'strong': (), 'b': (), 'em': (), 'i': (), 'u': (), 's': (), 'sub': (), 'sup': (),
+    'blockquote': ('cite',), 'pre': (), 'code': (),
+    'ul': (), 'ol': (), 'li': (),
+    'a': ('href', 'title', 'target'),
+    'img': ('src', 'alt', 'title', 'width', 'height'),
+    'figure': (), 'figcaption': (),
+    'table': (), 'thead': (), 'tbody': (), 'tr': (), 'th': ('colspan', 'rowspan'), 'td': ('colspan', 'rowspan'),
+    'iframe': ('src', 'width', 'height', 'allowfullscreen'),
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Dropped together with everything inside them.
+DROP_CONTENT_TAGS = {'script', 'style', 'noscript', 'template', 'object', 'embed', 'svg', 'math'}
+# Tags that separate words in the plain-text extract.
+BREAK_TAGS = {
+    'p', 'br', 'hr', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre',
+    'ul', 'ol', 'li', 'figure', 'figcaption', 'table', 'tr', 'th', 'td', 'img', 'iframe',
+}
+URL_ATTRIBUTES = {'href', 'src', 'cite'}
+SAFE_SCHEMES = {'', 'http', 'https', 'mailto'}
+# Video embeds are only kept from the platforms Video supports.
+EMBED_HOSTS = {
+    'www.youtube.com', 'youtube.com', 'www.youtube-nocookie.com',
+    'www.facebook.com', 'facebook.com',
+}
+
+EXCERPT_LENGTH = 200
+# Reading speeds in words per minute. Devanagari words carry more syllables and
+# conjuncts than English ones, so Nepali prose is read at fewer words a minute.
+DEVANAGARI_WPM = 150
+LATIN_WPM = 220
+
+# Runs of letters including Devanagari vowel signs and viramas, which \w alone
+# doesn't match; the danda (U+0964) and double danda (U+0965) end a word.
+WORD_RE = re.compile(r'[\w\u0900-\u0963\u0966-\u097f]+')
+DEVANAGARI_RE = re.compile(r'[\u0900-\u097f]')
+WHITESPACE_RE = re.compile(r'\s+')
+CONTROL_RE = re.compile(r'[\x00-\x20\x7f]+')
+
+ProcessedContent = namedtuple('ProcessedContent', 'html text excerpt first_image word_count read_time')
+
+
+def safe_url(value, tag):
+    url = CONTROL_RE.sub('', value)
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in SAFE_SCHEMES:
+        return None
+    if tag == 'iframe' and (parts.scheme.lower() != 'https' or parts.hostname not in EMBED_HOSTS):
+        return None
+    return value.strip()
+
+
+class _Sanitizer(HTMLParser):
+    """Rebuilds HTML from an allowlist of tags and attributes while collecting plain text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.text = []
+        self.open_tags = []
+        self.drop_depth = 0
+        self.first_image = ''
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth += 1
+            return
+        if self.drop_depth:
+            return
+        if tag in BREAK_TAGS:
+            self.text.append('\n')
+        if tag not in ALLOWED_TAGS:
+            return
+        kept = []
+        for name, value in attrs:
+            if name not in ALLOWED_TAGS[tag]:
+                continue
+            value = value or ''
+            if name in URL_ATTRIBUTES:
+                value = safe_url(value, tag)
+                if value is None:
+                    continue
+                if tag == 'img' and name == 'src' and not self.first_image:
+                    self.first_image = value
+            kept.append(f' {name}="{escape(value)}"')
+        if tag == 'a':
+            kept.append(' rel="noopener nofollow"')
+        if tag == 'iframe' and not any(k.startswith(' src=') for k in kept):
+            return
+        self.out.append(f'<{tag}{"".join(kept)}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth = max(self.drop_depth - 1, 0)
+            return
+        if self.drop_depth:
+            return
+        if tag in BREAK_TAGS:
+            self.text.append('\n')
+        if tag not in self.open_tags:
+            return
+        # Close anything left open inside ``tag`` so the output stays well formed.
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.out.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.drop_depth:
+            return
+        self.out.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def result(self):
+        self.close()
+        self.out.extend(f'</{tag}>' for tag in reversed(self.open_tags))
+        self.open_tags = []
+        return ''.join(self.out)
+
+
+def count_words(text):
+    """(Devanagari words, other words) in ``text``."""
+    devanagari = other = 0
+    for word in WORD_RE.findall(text):
+        if DEVANAGARI_RE.search(word):
+            devanagari += 1
+        else:
+            other += 1
+    return devanagari, other
+
+
+def read_time(devanagari_words, other_words):
+    """Whole minutes to read, at least one for any non-empty text."""
+    minutes = devanagari_words / DEVANAGARI_WPM + other_words / LATIN_WPM
+    return max(1, math.ceil(minutes)) if devanagari_words or other_words else 0
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    text = WHITESPACE_RE.sub(' ', text).strip()
+    if len(text) <= length:
+        return text
+    cut = text.rfind(' ', 0, length)
+    return text[:cut if cut > length // 2 else length].rstrip(' ,;:-।') + '…'
+
+
+def absolute_image_url(src, base_url):
+    """
+    ``src`` of an inline image resolved against ``base_url`` (uploads are
+    linked as /media/...), or '' unless that gives an http(s) URL a URLField
+    accepts.
+    """
+    if not src:
+        return ''
+    url = urljoin(base_url.rstrip('/') + '/', src)
+    try:
+        URLValidator(schemes=['http', 'https'])(url)
+    except ValidationError:
+        return ''
+    return url
+
+
+def process(html):
+    """Sanitize ``html`` once and derive everything the article stores alongside it."""
+    sanitizer = _Sanitizer()
+    sanitizer.feed(html or '')
+    clean_html = sanitizer.result()
+    text = '\n'.join(
+        WHITESPACE_RE.sub(' ', line).strip() for line in ''.join(sanitizer.text).split('\n')
+    )
+    text = re.sub(r'\n{2,}', '\n', text).strip()
+    devanagari, other = count_words(text)
+    return ProcessedContent(
+        html=clean_html,
+        text=text,
+        excerpt=make_excerpt(text),
+        first_image=sanitizer.first_image,
+        word_count=devanagari + other,
+        read_time=read_time(devanagari, other),
+    )
@@ -0,0 +1,195 @@
+import math
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import require_GET
+
+from .compression import cached_response
+from .models import Article, Category
+
+# The sitemap protocol allows at most 50,000 URLs (and 50MB) per file.
+SITEMAP_PAGE_SIZE = 50000
+NEWS_SITEMAP_MAX_AGE = timedelta(days=2)
+NEWS_SITEMAP_LIMIT = 1000
+FEED_ITEMS = 50
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+NEWS_NS = 'http://www.google.com/schemas/sitemap-news/0.9'
+
+
+def article_url(pk):
+    return f"{settings.SITE_URL}/article/{pk}"
+
+
+def category_url(pk):
+    return f"{settings.SITE_URL}/category/{pk}"
+
+
+def published_at(publish_date, publish_time):
+    return timezone.make_aware(datetime.combine(publish_date, publish_time))
+
+
+def feed_version(scope):
+    """Current cache generation for ``scope``; bumped by invalidate_feeds()."""
+    return cache.get_or_set(f'feeds:version:{scope}', 1, None)
+
+
+def invalidate_feeds(category_ids=()):
+    """
+    Make the sitemaps and the given categories' feeds regenerate on the first
+    request after the current transaction commits; bumping earlier would let a
+    request in between cache the old rows under the new version.
+    """
+    scopes = ['sitemap'] + [f'category:{pk}' for pk in category_ids]
+
+    def bump():
+        for scope in scopes:
+            key = f'feeds:version:{scope}'
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 2, None)
+
+    transaction.on_commit(bump)
+
+
+def cached_xml(request, scope, name, build, content_type):
+    key = f'feeds:{scope}:{feed_version(scope)}:{name}'
+    return cached_response(
+        request, key, lambda: b''.join(chunk.encode('utf-8') for chunk in build()),
+        content_type, FEED_CACHE_TIMEOUT,
+    )
+
+
+def published_articles():
+    return Article.objects.filter(status='published')
+
+
+class CategoryRssFeed(Feed):
+    def get_object(self, request, pk):
+        return get_object_or_404(Category, pk=pk, isActive=True)
+
+    def title(self, obj):
+        return obj.seoTitle or obj.name
+
+    def description(self, obj):
+        return obj.seoDescription or obj.description
+
+    def link(self, obj):
+        return category_url(obj.pk)
+
+    def items(self, obj):
+        return (published_articles().filter(category=obj).select_related('author')
+                .order_by('-publishDate', '-publishTime')[:FEED_ITEMS])
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return article_url(item.pk)
+
+    def item_author_name(self, item):
+        return item.author.name
+
+    def item_pubdate(self, item):
+        return published_at(item.publishDate, item.publishTime)
+
+    def item_updateddate(self, item):
+        return item.updatedAt
+
+    def item_categories(self, item):
+        return item.tags
+
+
+class CategoryAtomFeed(CategoryRssFeed):
+    feed_type = Atom1Feed
+    subtitle = CategoryRssFeed.description
+
+
+@require_GET
+def category_feed(request, pk, kind):
+    feed = CategoryAtomFeed() if kind == 'atom' else CategoryRssFeed()
+
+    def build():
+        yield feed(request, pk=pk).content.decode('utf-8')
+
+    return cached_xml(request, f'category:{pk}', kind, build, feed.feed_type.content_type)
+
+
+def sitemap_pages():
+    """Number of article sitemap pages, cached until the next invalidate_feeds()."""
+    key = f"feeds:sitemap:{feed_version('sitemap')}:pages"
+    pages = cache.get(key)
+    if pages is None:
+        pages = max(1, math.ceil(published_articles().count() / SITEMAP_PAGE_SIZE))
+        cache.set(key, pages, FEED_CACHE_TIMEOUT)
+    return pages
+
+
+@require_GET
+def sitemap_index(request):
+    def build():
+        yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+        base = request.build_absolute_uri('/api/')
+        yield f'<sitemap><loc>{escape(base)}sitemap-categories.xml</loc></sitemap>\n'
+        for page in range(1, sitemap_pages() + 1):
+            yield f'<sitemap><loc>{escape(base)}sitemap-articles-{page}.xml</loc></sitemap>\n'
+        yield '</sitemapindex>\n'
+    return cached_xml(request, 'sitemap', 'index', build, 'application/xml')
+
+
+@require_GET
+def category_sitemap(request):
+    def build():
+        yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+        for pk in Category.objects.filter(isActive=True).order_by('order').values_list('pk', flat=True):
+            yield f'<url><loc>{escape(category_url(pk))}</loc><changefreq>hourly</changefreq></url>\n'
+        yield '</urlset>\n'
+    return cached_xml(request, 'sitemap', 'categories', build, 'application/xml')
+
+
+@require_GET
+def article_sitemap(request, page):
+    if page < 1 or page > sitemap_pages():
+        raise Http404('No such sitemap page.')
+
+    def build():
+        yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+        rows = (published_articles().order_by('pk').values_list('pk', 'updatedAt')
+                [(page - 1) * SITEMAP_PAGE_SIZE:page * SITEMAP_PAGE_SIZE])
+        for pk, updated in rows.iterator(chunk_size=2000):
+            yield (f'<url><loc>{escape(article_url(pk))}</loc>'
+                   f'<lastmod>{updated.date().isoformat()}</lastmod></url>\n')
+        yield '</urlset>\n'
+    return cached_xml(request, 'sitemap', f'articles-{page}', build, 'application/xml')
+
+
+@require_GET
+def news_sitemap(request):
+    def build():
+        yield (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+               f'<urlset xmlns="{SITEMAP_NS}" xmlns:news="{NEWS_NS}">\n')
+        since = timezone.localdate() - NEWS_SITEMAP_MAX_AGE
+        rows = (published_articles().filter(publishDate__gte=since)
+                .order_by('-publishDate', '-publishTime')
+                .values_list('pk', 'title', 'publishDate', 'publishTime')[:NEWS_SITEMAP_LIMIT])
+        for pk, title, publish_date, publish_time in rows.iterator(chunk_size=1000):
+            yield (f'<url><loc>{escape(article_url(pk))}</loc><news:news>'
+                   f'<news:publication><news:name>{escape(settings.SITE_NAME)}</news:name>'
+                   f'<news:language>ne</news:language></news:publication>'
+                   f'<news:publication_date>{published_at(publish_date, publish_time).isoformat()}</news:publication_date>'
+                   f'<news:title>{escape(title)}</news:title></news:news></url>\n')
+        yield '</urlset>\n'
+    return cached_xml(request, 'sitemap', f'news-{timezone.localdate()}', build, 'application/xml')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API endpoints and write a JSON baseline, optionally comparing it with a previous run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--only', nargs='*', help='Run only these scenarios (e.g. article-list login).')
+        parser.add_argument('--with-rate-limits', action='store_true', help='Keep API rate limiting on while benchmarking.')
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the JSON report.')
+        parser.add_argument('--compare', help='Baseline JSON report to compare against.')
+        parser.add_argument('--threshold', type=float, default=0.10, help='Allowed relative regression (0.10 = 10%%).')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1.')
+        report = benchmark.run(
+            requests=options['requests'], concurrency=options['concurrency'],
+            only=options['only'], rate_limits=options['with_rate_limits'], stdout=self.stdout,
+        )
+        benchmark.save_report(report, options['output'])
+        self.stdout.write(f"Report written to {options['output']}")
+
+        if options['compare']:
+            regressions = benchmark.compare(benchmark.load_report(options['compare']), report, options['threshold'])
+            if regressions:
+                raise CommandError('Regressions found:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
@@ -0,0 +1,21 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from accounts import bulk
+
+
+class Command(BaseCommand):
+    help = 'Export every article as NDJSON, streaming the table in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, or '-' for stdout.")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            sys.stdout.writelines(bulk.export_ndjson(chunk_size=options['chunk_size']))
+            return
+        with open(options['path'], 'w', encoding='utf-8') as fh:
+            fh.writelines(bulk.export_ndjson(chunk_size=options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(f"Articles exported to {options['path']}"))
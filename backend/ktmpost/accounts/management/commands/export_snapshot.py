@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import snapshot
+
+
+class Command(BaseCommand):
+    help = 'Prerender the public API into a static directory tree with precompressed variants.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Directory served as /api/ by the CDN.')
+        parser.add_argument('--base-url', default='http://localhost',
+                            help='Origin the files are served from, used for absolute URLs in sitemaps.')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processes rendering article pages (default: one per CPU).')
+        parser.add_argument('--full', action='store_true', help='Re-render every article, ignoring the last run.')
+
+    def handle(self, *args, **options):
+        try:
+            summary = snapshot.export(
+                options['output'], base_url=options['base_url'], workers=options['workers'], full=options['full'],
+            )
+        except snapshot.SnapshotError as e:
+            raise CommandError(f'Snapshot aborted: {e}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot written to {options['output']}: {summary['articles']} articles rendered, "
+            f"{summary['removed']} files removed, {summary['written']} files changed."
+        ))
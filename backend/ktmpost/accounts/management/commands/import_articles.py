@@ -0,0 +1,23 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from accounts import bulk
+
+
+class Command(BaseCommand):
+    help = 'Import articles from an NDJSON file (one article object per line) in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file to read, or '-' for stdin.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            created, errors = bulk.import_ndjson(sys.stdin, batch_size=options['batch_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as fh:
+                created, errors = bulk.import_ndjson(fh, batch_size=options['batch_size'])
+        for error in errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} articles ({len(errors)} lines rejected).'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounts import related
+from accounts.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the article tag rows and the precomputed related-articles index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Only index the most recent N articles.')
+
+    def handle(self, *args, **options):
+        queryset = Article.objects.all()
+        if options['limit']:
+            ids = list(Article.objects.order_by('-pk').values_list('pk', flat=True)[:options['limit']])
+            queryset = queryset.filter(pk__in=ids)
+        count = related.rebuild(queryset, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} articles.'))
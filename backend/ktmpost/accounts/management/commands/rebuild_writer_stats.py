@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts import authors
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-writer article aggregates shown on author pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('writer_ids', nargs='*', type=int, help='Only rebuild these writers.')
+
+    def handle(self, *args, **options):
+        count = authors.rebuild(options['writer_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt aggregates for {count} writers.'))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Seed the database with realistic volumes of Nepali articles, writers, categories and videos for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100000)
+        parser.add_argument('--writers', type=int, default=2000)
+        parser.add_argument('--categories', type=int, default=1000)
+        parser.add_argument('--videos', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--related-sample', type=int, default=1000,
+                            help='Number of most recent articles to build the related-articles index for.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for reproducible data sets.')
+        parser.add_argument('--allow', action='store_true', help='Seed even though DEBUG is off.')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['allow']:
+            raise CommandError('Seeding adds a superuser and bulk fake content; it only runs with DEBUG on '
+                               'unless --allow is given.')
+        benchmark.seed(
+            articles=options['articles'], writers=options['writers'], categories=options['categories'],
+            videos=options['videos'], batch_size=options['batch_size'], seed_value=options['seed'],
+            related_sample=options['related_sample'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark data seeded.'))
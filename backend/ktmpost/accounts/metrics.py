@@ -0,0 +1,198 @@
+import random
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Upper bounds (seconds / counts) of the histogram buckets, Prometheus style.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+METRICS = {
+    'ktmpost_request_latency_seconds': ('Total request latency.', LATENCY_BUCKETS),
+    'ktmpost_sql_time_seconds': ('Time spent executing SQL per request.', LATENCY_BUCKETS),
+    'ktmpost_serializer_time_seconds': ('Time spent in serializer to_representation per request.', LATENCY_BUCKETS),
+    'ktmpost_sql_queries': ('Number of SQL queries per request.', QUERY_COUNT_BUCKETS),
+}
+
+COUNTERS = {
+    'ktmpost_throttle_requests_total': 'Requests checked by the rate limiter, by scope and outcome.',
+    'ktmpost_purge_requests_total': 'Purge requests sent to the reverse proxy, by outcome.',
+}
+
+_current = ContextVar('ktmpost_request_metrics', default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """In-memory histograms keyed by metric name, view name and HTTP method, plus labelled counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, view, method, values):
+        with self._lock:
+            for name, value in values.items():
+                key = (name, view, method)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(METRICS[name][1])
+                histogram.observe(value)
+
+    def increment(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render_prometheus(self):
+        with self._lock:
+            snapshot = {
+                key: (list(h.counts), h.sum, h.count, h.buckets)
+                for key, h in self._histograms.items()
+            }
+            counters = dict(self._counters)
+        lines = []
+        for name, (help_text, _) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (metric, view, method), (counts, total, count, buckets) in sorted(snapshot.items()):
+                if metric != name:
+                    continue
+                labels = f'view="{view}",method="{method}"'
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{{labels}}} {total}')
+                lines.append(f'{name}_count{{{labels}}} {count}')
+        for name, help_text in COUNTERS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f'{name}{{{label_text}}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.sql_count += 1
+
+
+class MetricsMiddleware:
+    """
+    Records SQL count, SQL time, serializer time and total latency for a sample
+    of requests. The share of sampled requests is set by METRICS_SAMPLE_RATE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        start = time.perf_counter()
+        response = self.measure(metrics, self.get_response, request)
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else 'unresolved'
+
+        def record():
+            registry.observe(view, request.method, {
+                'ktmpost_request_latency_seconds': time.perf_counter() - start,
+                'ktmpost_sql_time_seconds': metrics.sql_time,
+                'ktmpost_serializer_time_seconds': metrics.serializer_time,
+                'ktmpost_sql_queries': metrics.sql_count,
+            })
+
+        if response.streaming:
+            # Streaming list views run their queries while the body is consumed.
+            response.streaming_content = self.measure_stream(metrics, response.streaming_content, record)
+        else:
+            record()
+        return response
+
+    @staticmethod
+    def measure(metrics, func, *args):
+        """Call ``func`` with its queries and serializer time counted in ``metrics``."""
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(metrics))
+                return func(*args)
+        finally:
+            _current.reset(token)
+
+    def measure_stream(self, metrics, content, record):
+        """Yield ``content`` with the work producing each chunk counted, then call ``record``."""
+        iterator = iter(content)
+        done = object()
+        try:
+            while True:
+                chunk = self.measure(metrics, next, iterator, done)
+                if chunk is done:
+                    break
+                yield chunk
+        finally:
+            close = getattr(content, 'close', None)
+            if close is not None:
+                close()
+            record()
+
+
+class TimedSerializerMixin:
+    """Adds the time spent in to_representation to the sampled request's metrics."""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_article_tags(apps, schema_editor):
+    Article = apps.get_model('accounts', 'Article')
+    ArticleTag = apps.get_model('accounts', 'ArticleTag')
+    batch = []
+    for pk, tags in Article.objects.values_list('pk', 'tags').iterator(chunk_size=2000):
+        for name in {str(tag)[:255] for tag in tags or [] if tag}:
+            batch.append(ArticleTag(article_id=pk, name=name))
+        if len(batch) >= 2000:
+            ArticleTag.objects.bulk_create(batch)
+            batch = []
+    ArticleTag.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['category', 'status', 'publishDate', 'publishTime'], name='article_cat_status_pub_idx'),
+        ),
+        migrations.AddField(
+            model_name='articletag',
+            name='article',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_rows', to='accounts.article'),
+        ),
+        migrations.AddField(
+            model_name='relatedarticle',
+            name='article',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_rows', to='accounts.article'),
+        ),
+        migrations.AddField(
+            model_name='relatedarticle',
+            name='related',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.article'),
+        ),
+        migrations.AddIndex(
+            model_name='articletag',
+            index=models.Index(fields=['name', 'article'], name='articletag_name_article_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='articletag',
+            constraint=models.UniqueConstraint(fields=('article', 'name'), name='unique_article_tag'),
+        ),
+        migrations.AddIndex(
+            model_name='relatedarticle',
+            index=models.Index(fields=['article', '-score'], name='related_article_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedarticle',
+            constraint=models.UniqueConstraint(fields=('article', 'related'), name='unique_related_article'),
+        ),
+        migrations.RunPython(backfill_article_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_tags_and_subcategories(apps, schema_editor):
+    Category = apps.get_model('accounts', 'Category')
+    Subcategory = apps.get_model('accounts', 'Subcategory')
+    ArticleTag = apps.get_model('accounts', 'ArticleTag')
+    Tag = apps.get_model('accounts', 'Tag')
+
+    rows = []
+    for pk, names in Category.objects.values_list('pk', 'subcategories').iterator():
+        seen = set()
+        for order, name in enumerate(names or []):
+            name = str(name)[:255]
+            if name and name not in seen:
+                seen.add(name)
+                rows.append(Subcategory(category_id=pk, name=name, order=order))
+    Subcategory.objects.bulk_create(rows, batch_size=2000)
+
+    counts = ArticleTag.objects.values_list('name').annotate(n=models.Count('id')).order_by()
+    Tag.objects.bulk_create([Tag(name=name, articlesCount=n) for name, n in counts.iterator()], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_articletag_relatedarticle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subcategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('order', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('articlesCount', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['category', 'subcategory', 'status', 'publishDate', 'publishTime'], name='article_subcat_pub_idx'),
+        ),
+        migrations.AddField(
+            model_name='subcategory',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subcategory_rows', to='accounts.category'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-articlesCount'], name='tag_articles_count_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='subcategory',
+            constraint=models.UniqueConstraint(fields=('category', 'name'), name='unique_category_subcategory'),
+        ),
+        migrations.RunPython(backfill_tags_and_subcategories, migrations.RunPython.noop),
+    ]
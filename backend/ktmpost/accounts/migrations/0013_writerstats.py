@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+
+STATUS_FIELDS = {'published': 'published_count', 'draft': 'draft_count', 'scheduled': 'scheduled_count'}
+
+
+def backfill_writer_stats(apps, schema_editor):
+    Article = apps.get_model('accounts', 'Article')
+    Writer = apps.get_model('accounts', 'Writer')
+    WriterStats = apps.get_model('accounts', 'WriterStats')
+
+    latest = Article.objects.filter(author=OuterRef('pk'), status='published').order_by('-publishDate', '-publishTime')
+    rows = {
+        pk: {
+            'published_count': 0, 'draft_count': 0, 'scheduled_count': 0, 'total_views': 0,
+            'last_published_date': last_date, 'last_published_time': last_time, 'category_counts': {},
+        }
+        for pk, last_date, last_time in Writer.objects.annotate(
+            last_date=Subquery(latest.values('publishDate')[:1]),
+            last_time=Subquery(latest.values('publishTime')[:1]),
+        ).values_list('pk', 'last_date', 'last_time')
+    }
+    by_status = Article.objects.values_list('author_id', 'status').annotate(n=Count('id'), views=Sum('views')).order_by()
+    for author_id, status, n, views in by_status:
+        if status in STATUS_FIELDS:
+            rows[author_id][STATUS_FIELDS[status]] = n
+        rows[author_id]['total_views'] += views or 0
+    by_category = (Article.objects.filter(status='published').values_list('author_id', 'category_id')
+                   .annotate(n=Count('id')).order_by())
+    for author_id, category_id, n in by_category:
+        rows[author_id]['category_counts'][str(category_id)] = n
+
+    WriterStats.objects.bulk_create(
+        [WriterStats(writer_id=pk, **values) for pk, values in rows.items()], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_article_content_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WriterStats',
+            fields=[
+                ('writer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='accounts.writer')),
+                ('published_count', models.IntegerField(default=0)),
+                ('draft_count', models.IntegerField(default=0)),
+                ('scheduled_count', models.IntegerField(default=0)),
+                ('total_views', models.BigIntegerField(default=0)),
+                ('last_published_date', models.DateField(blank=True, null=True)),
+                ('last_published_time', models.TimeField(blank=True, null=True)),
+                ('category_counts', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['author', 'status', 'publishDate', 'publishTime'], name='article_author_pub_idx'),
+        ),
+        migrations.RunPython(backfill_writer_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_archive_days(apps, schema_editor):
+    Article = apps.get_model('accounts', 'Article')
+    ArchiveDay = apps.get_model('accounts', 'ArchiveDay')
+    rows = (Article.objects.filter(status='published').values_list('category_id', 'publishDate')
+            .annotate(n=Count('id')).order_by())
+    ArchiveDay.objects.bulk_create(
+        [ArchiveDay(category_id=category_id, date=day, articlesCount=n) for category_id, day, n in rows],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_writerstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('articlesCount', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='archiveday_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('category', 'date'), name='unique_archive_day')],
+            },
+        ),
+        migrations.RunPython(backfill_archive_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_archiveday'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='article',
+            name='article_featured_partial_idx',
+        ),
+    ]
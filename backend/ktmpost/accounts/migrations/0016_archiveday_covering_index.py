@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_drop_partial_featured_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='archiveday',
+            name='archiveday_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='archiveday',
+            index=models.Index(fields=['date', 'articlesCount'], name='archiveday_date_count_idx'),
+        ),
+    ]
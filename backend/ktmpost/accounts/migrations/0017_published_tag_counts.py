@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def recount_published(apps, schema_editor):
+    # Tag.articlesCount used to count drafts and scheduled articles too.
+    ArticleTag = apps.get_model('accounts', 'ArticleTag')
+    Tag = apps.get_model('accounts', 'Tag')
+    counts = dict(
+        ArticleTag.objects.filter(article__status='published').values_list('name').annotate(n=Count('id')).order_by()
+    )
+    for tag in Tag.objects.only('id', 'name', 'articlesCount').iterator():
+        if tag.articlesCount != counts.get(tag.name, 0):
+            Tag.objects.filter(pk=tag.pk).update(articlesCount=counts.get(tag.name, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_archiveday_covering_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_published, migrations.RunPython.noop),
+    ]
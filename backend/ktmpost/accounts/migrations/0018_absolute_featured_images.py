@@ -0,0 +1,43 @@
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import migrations
+
+
+def absolutize_featured_images(apps, schema_editor):
+    # The 0012 backfill copied inline image sources as written, e.g. /media/uploads/...
+    Article = apps.get_model('accounts', 'Article')
+    validate = URLValidator(schemes=['http', 'https'])
+    base_url = settings.SITE_URL.rstrip('/') + '/'
+    batch = []
+    queryset = Article.objects.exclude(featuredImage='').only('id', 'featuredImage')
+    for article in queryset.iterator(chunk_size=500):
+        try:
+            validate(article.featuredImage)
+            continue
+        except ValidationError:
+            pass
+        url = urljoin(base_url, article.featuredImage)
+        try:
+            validate(url)
+        except ValidationError:
+            url = ''
+        article.featuredImage = url
+        batch.append(article)
+        if len(batch) >= 500:
+            Article.objects.bulk_update(batch, ['featuredImage'])
+            batch = []
+    Article.objects.bulk_update(batch, ['featuredImage'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_published_tag_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(absolutize_featured_images, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,8 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from . import content as content_processing
+
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
         ('admin', 'Admin'),
@@ -52,6 +54,26 @@ class Category(models.Model):
     order = models.IntegerField(default=0)
     createdAt = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['isActive', 'order'], name='category_active_order_idx'),
+            models.Index(fields=['order'], name='category_order_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class Subcategory(models.Model):
+    """Indexed mirror of ``Category.subcategories``, kept in sync on category save."""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='subcategory_rows')
+    name = models.CharField(max_length=255)
+    order = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'name'], name='unique_category_subcategory'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -62,8 +84,9 @@ class Article(models.Model):
         ('scheduled', 'Scheduled'),
     )
     title = models.CharField(max_length=255)
-    excerpt = models.TextField()
+    excerpt = models.TextField(blank=True)
     content = models.TextField()
+    contentHtml = models.TextField(blank=True)  # sanitized content, derived on save
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='articles')
     subcategory = models.CharField(max_length=255, blank=True)
     author = models.ForeignKey(Writer, on_delete=models.CASCADE, related_name='articles')
@@ -85,15 +108,36 @@ class Article(models.Model):
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'publishDate', 'publishTime'], name='article_status_pub_idx'),
+            models.Index(fields=['publishDate', 'publishTime'], name='article_pub_idx'),
+            models.Index(fields=['category', 'status', 'publishDate', 'publishTime'], name='article_cat_status_pub_idx'),
+            models.Index(fields=['category', 'subcategory', 'status', 'publishDate', 'publishTime'], name='article_subcat_pub_idx'),
+            models.Index(fields=['author', 'status', 'publishDate', 'publishTime'], name='article_author_pub_idx'),
+            models.Index(fields=['isFeatured', 'updatedAt'], name='article_featured_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
     def clean(self):
         if self.subcategory and self.category:
-            if self.subcategory not in self.category.subcategories:
+            if not self.category.subcategory_rows.filter(name=self.subcategory).exists():
                 raise ValidationError(f"Subcategory '{self.subcategory}' is not valid for category '{self.category.name}'.")
 
+    def process_content(self):
+        """Derive contentHtml and readTime from content, filling in a blank excerpt or featured image."""
+        processed = content_processing.process(self.content)
+        self.contentHtml = processed.html
+        self.readTime = processed.read_time
+        if not self.excerpt.strip():
+            self.excerpt = processed.excerpt
+        if not self.featuredImage:
+            self.featuredImage = content_processing.absolute_image_url(processed.first_image, settings.SITE_URL)
+
     def save(self, *args, **kwargs):
+        content_changed = True
         if self.pk is None:
             self.category.articlesCount += 1
             self.category.save()
@@ -101,6 +145,7 @@ class Article(models.Model):
             self.author.save()
         else:
             old_article = Article.objects.get(pk=self.pk)
+            content_changed = old_article.content != self.content or not self.contentHtml
             if old_article.category_id != self.category_id:
                 old_article.category.articlesCount -= 1
                 old_article.category.save()
@@ -120,8 +165,108 @@ class Article(models.Model):
                     oldest_featured.isFeatured = False
                     oldest_featured.save()
 
+        if content_changed:
+            self.process_content()
         super().save(*args, **kwargs)
 
+class Tag(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    articlesCount = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-articlesCount'], name='tag_articles_count_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class WriterStats(models.Model):
+    """Per-writer article aggregates for the public author page, updated as articles change."""
+    writer = models.OneToOneField(Writer, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    published_count = models.IntegerField(default=0)
+    draft_count = models.IntegerField(default=0)
+    scheduled_count = models.IntegerField(default=0)
+    total_views = models.BigIntegerField(default=0)
+    last_published_date = models.DateField(null=True, blank=True)
+    last_published_time = models.TimeField(null=True, blank=True)
+    # Published articles per category id (JSON keys are strings).
+    category_counts = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.writer_id}"
+
+class ArchiveDay(models.Model):
+    """Number of published articles per category and publish date, for archive calendars."""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+    articlesCount = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'date'], name='unique_archive_day'),
+        ]
+        indexes = [
+            # Covers the calendar sums, so the yearly totals read the index rather than the table.
+            models.Index(fields=['date', 'articlesCount'], name='archiveday_date_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} {self.date}"
+
+class ArticleRevision(models.Model):
+    """
+    One saved version of an article. ``content_data`` holds the zlib-compressed
+    content for snapshots, or a compressed token diff against the previous
+    revision otherwise; the smaller fields are kept whole in ``fields``.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    is_snapshot = models.BooleanField(default=False)
+    content_data = models.BinaryField()
+    fields = models.JSONField(default=dict)
+    editor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    createdAt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'number'], name='unique_article_revision'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} v{self.number}"
+
+class ArticleTag(models.Model):
+    """One row per tag of an article, so articles can be looked up by tag through an index."""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='tag_rows')
+    name = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'name'], name='unique_article_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['name', 'article'], name='articletag_name_article_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class RelatedArticle(models.Model):
+    """Precomputed related-story list of an article, highest score first."""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_rows')
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'related'], name='unique_related_article'),
+        ]
+        indexes = [
+            models.Index(fields=['article', '-score'], name='related_article_score_idx'),
+        ]
+
 
 
 class VideoCategory(models.Model):
@@ -170,6 +315,12 @@ class Video(models.Model):
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_live', 'status'], name='video_live_status_idx'),
+            models.Index(fields=['status', 'createdAt'], name='video_status_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
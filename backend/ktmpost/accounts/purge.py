@@ -0,0 +1,124 @@
+import json
+import logging
+import urllib.error
+import urllib.request
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# URL name -> surrogate keys of its public GET responses; {pk} is filled from the URL.
+SURROGATE_KEYS = {
+    'article-list-create': ['home'],
+    'article-detail': ['article:{pk}'],
+    'article-related': ['article:{pk}', 'home'],
+    'article-trending': ['home'],
+    'category-list-create': ['home'],
+    'category-tree': ['home'],
+    'subcategory-list': ['category:{pk}'],
+    'subcategory-articles': ['category:{pk}'],
+    'category-rss': ['category:{pk}'],
+    'category-atom': ['category:{pk}'],
+    'sitemap-index': ['home'],
+    'sitemap-categories': ['home'],
+    'sitemap-articles': ['home'],
+    'news-sitemap': ['home'],
+    'tag-list': ['home'],
+    'tag-articles': ['home'],
+    'archive-years': ['home'],
+    'archive-months': ['home'],
+    'archive-days': ['home'],
+    'archive-day-articles': ['home'],
+    'writer-profile': ['home'],
+    'writer-articles': ['home'],
+    'live-video-list': ['video-live'],
+}
+
+# Responses that change without a purge (view counts, trending ranks) and so are
+# only cached for SURROGATE_SHORT_MAX_AGE seconds.
+SHORT_LIVED = {'article-detail', 'article-trending'}
+
+_batch = ContextVar('ktmpost_purge_batch', default=None)
+
+
+def article_keys(article_id, *category_ids):
+    return ['home', f'article:{article_id}'] + [f'category:{pk}' for pk in category_ids if pk is not None]
+
+
+def purge(keys):
+    """
+    Ask the proxy to drop responses tagged with ``keys`` once the current
+    transaction commits. During a request the keys are collected and sent
+    together when the response is ready.
+    """
+    if not getattr(settings, 'PURGE_URL', ''):
+        return
+    keys = set(keys)
+
+    def enqueue():
+        batch = _batch.get()
+        if batch is not None:
+            batch.update(keys)
+        else:
+            send(keys)
+
+    transaction.on_commit(enqueue)
+
+
+def send(keys):
+    """POST ``keys`` to PURGE_URL in batches of PURGE_BATCH_SIZE; failures are logged, never raised."""
+    keys = sorted(set(keys))
+    batch_size = getattr(settings, 'PURGE_BATCH_SIZE', 256)
+    headers = {'Content-Type': 'application/json'}
+    if getattr(settings, 'PURGE_TOKEN', ''):
+        headers['Authorization'] = f"Bearer {settings.PURGE_TOKEN}"
+    for start in range(0, len(keys), batch_size):
+        chunk = keys[start:start + batch_size]
+        request = urllib.request.Request(
+            settings.PURGE_URL, data=json.dumps({'keys': chunk}).encode('utf-8'), headers=headers, method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=getattr(settings, 'PURGE_TIMEOUT', 2)) as response:
+                response.read()
+            registry.increment('ktmpost_purge_requests_total', outcome='ok')
+        except (urllib.error.URLError, OSError) as e:
+            registry.increment('ktmpost_purge_requests_total', outcome='error')
+            logger.error(f"Purge of {len(chunk)} surrogate keys failed: {str(e)}")
+
+
+class SurrogateKeyMiddleware:
+    """
+    Tags public GET responses with surrogate keys (see SURROGATE_KEYS) so the
+    reverse proxy can cache them for SURROGATE_MAX_AGE seconds (or
+    SURROGATE_SHORT_MAX_AGE for SHORT_LIVED ones), and sends the
+    purges triggered while handling a request as one de-duplicated batch.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        batch = set()
+        token = _batch.set(batch)
+        try:
+            response = self.get_response(request)
+        finally:
+            _batch.reset(token)
+        if batch:
+            send(batch)
+
+        match = getattr(request, 'resolver_match', None)
+        templates = SURROGATE_KEYS.get(match.url_name) if match else None
+        if templates and request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+            header = getattr(settings, 'SURROGATE_KEY_HEADER', 'Surrogate-Key')
+            response.headers[header] = ' '.join(template.format(**match.kwargs) for template in templates)
+            if match.url_name in SHORT_LIVED:
+                max_age = getattr(settings, 'SURROGATE_SHORT_MAX_AGE', 60)
+            else:
+                max_age = getattr(settings, 'SURROGATE_MAX_AGE', 3600)
+            response.headers['Surrogate-Control'] = f"max-age={max_age}"
+        return response
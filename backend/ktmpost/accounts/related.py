@@ -0,0 +1,157 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Article, ArticleTag, RelatedArticle
+from .taxonomy import clean_tags, sync_tags
+
+logger = logging.getLogger(__name__)
+
+RELATED_LIMIT = 10
+# Candidates fetched per tag and from the same category; keeps the cost of an
+# update bounded no matter how large the archive grows.
+CANDIDATES_PER_SOURCE = 200
+MAX_TAGS = 10
+
+TAG_WEIGHT = 3.0
+SUBCATEGORY_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.0
+RECENCY_DAYS = 7.0
+
+CANDIDATE_FIELDS = ['id', 'tags', 'category_id', 'subcategory', 'publishDate', 'status']
+
+
+def as_date(value):
+    # publishDate defaults to timezone.now and may be assigned as a string, so
+    # unsaved instances can carry a datetime or str; normalize as the field does.
+    return Article._meta.get_field('publishDate').to_python(value)
+
+
+def score(article, candidate, article_tags=None):
+    """Relatedness of two articles: shared tags, category, subcategory and how close they were published."""
+    if article_tags is None:
+        article_tags = clean_tags(article.tags)
+    value = TAG_WEIGHT * len(article_tags & clean_tags(candidate.tags))
+    if article.category_id == candidate.category_id:
+        value += CATEGORY_WEIGHT
+        if article.subcategory and article.subcategory == candidate.subcategory:
+            value += SUBCATEGORY_WEIGHT
+    if not value:
+        return 0.0
+    days_apart = abs((as_date(article.publishDate) - as_date(candidate.publishDate)).days)
+    return value + 1.0 / (1.0 + days_apart / RECENCY_DAYS)
+
+
+def candidate_ids(article, tags):
+    ids = set()
+    for tag in sorted(tags)[:MAX_TAGS]:
+        ids.update(
+            ArticleTag.objects.filter(name=tag).exclude(article_id=article.pk)
+            .order_by('-article_id').values_list('article_id', flat=True)[:CANDIDATES_PER_SOURCE]
+        )
+    ids.update(
+        Article.objects.filter(category_id=article.category_id, status='published').exclude(pk=article.pk)
+        .order_by('-publishDate', '-publishTime').values_list('pk', flat=True)[:CANDIDATES_PER_SOURCE]
+    )
+    return ids
+
+
+def _trim(article_id):
+    keep = list(
+        RelatedArticle.objects.filter(article_id=article_id).order_by('-score').values_list('pk', flat=True)[:RELATED_LIMIT]
+    )
+    RelatedArticle.objects.filter(article_id=article_id).exclude(pk__in=keep).delete()
+
+
+def top_related(article, tags=None):
+    """(score, id) of the best RELATED_LIMIT matches for ``article``, highest first."""
+    if tags is None:
+        tags = clean_tags(article.tags)
+    candidates = Article.objects.filter(
+        pk__in=candidate_ids(article, tags), status='published'
+    ).only(*CANDIDATE_FIELDS)
+    scored = sorted(
+        ((score(article, c, tags), c.pk) for c in candidates), reverse=True
+    )
+    return [(s, pk) for s, pk in scored if s > 0][:RELATED_LIMIT]
+
+
+def refill(article_ids):
+    """Recompute the lists of ``article_ids`` from scratch, e.g. after one of their entries went away."""
+    for article in Article.objects.filter(pk__in=article_ids, status='published').only(*CANDIDATE_FIELDS):
+        RelatedArticle.objects.filter(article=article).delete()
+        RelatedArticle.objects.bulk_create(
+            [RelatedArticle(article=article, related_id=pk, score=s) for s, pk in top_related(article)]
+        )
+
+
+def drop_article(article):
+    """Take ``article`` out of the index; returns the ids of the lists it was removed from."""
+    holders = list(RelatedArticle.objects.filter(related=article).values_list('article_id', flat=True))
+    RelatedArticle.objects.filter(Q(article=article) | Q(related=article)).delete()
+    return holders
+
+
+def update_article(article):
+    """
+    Recompute the related list of ``article``, rescore it in the lists that
+    already hold it and offer it to the lists of its top matches, so the
+    index stays current without full rebuilds.
+    """
+    with transaction.atomic():
+        if article.status != 'published':
+            refill(drop_article(article))
+            return
+
+        tags = clean_tags(article.tags)
+        top = top_related(article, tags)
+        RelatedArticle.objects.filter(article=article).delete()
+        RelatedArticle.objects.bulk_create(
+            [RelatedArticle(article=article, related_id=pk, score=s) for s, pk in top]
+        )
+
+        # Scores are symmetric, so the lists holding the article are rescored in
+        # place; only those it no longer matches at all need refilling.
+        held = {row.article_id: row for row in RelatedArticle.objects.filter(related=article)}
+        holders = Article.objects.filter(pk__in=list(held)).only(*CANDIDATE_FIELDS)
+        rescored, dropped = [], []
+        for holder in holders:
+            row = held[holder.pk]
+            row.score = score(article, holder, tags)
+            (rescored if row.score > 0 else dropped).append(row)
+        RelatedArticle.objects.bulk_update(rescored, ['score'])
+        RelatedArticle.objects.filter(pk__in=[row.pk for row in dropped]).delete()
+
+        offered = [(s, pk) for s, pk in top if pk not in held]
+        RelatedArticle.objects.bulk_create(
+            [RelatedArticle(article_id=pk, related=article, score=s) for s, pk in offered]
+        )
+        for _, pk in offered:
+            _trim(pk)
+        refill([row.article_id for row in dropped])
+
+
+def index_article(article, was_published=None):
+    sync_tags(article, was_published)
+    update_article(article)
+
+
+def related_for(article_id, limit=RELATED_LIMIT):
+    """Related articles of ``article_id``, served straight from the precomputed index."""
+    rows = (RelatedArticle.objects.filter(article_id=article_id)
+            .select_related('related__category').order_by('-score')[:limit])
+    return [row.related for row in rows]
+
+
+def rebuild(queryset=None, stdout=None):
+    """Rebuild tag rows and related lists for ``queryset`` (all articles by default)."""
+    queryset = queryset if queryset is not None else Article.objects.all()
+    count = 0
+    for article in queryset.order_by('pk').only(*CANDIDATE_FIELDS).iterator(chunk_size=500):
+        index_article(article)
+        count += 1
+        if stdout and count % 1000 == 0:
+            stdout.write(f'Indexed {count} articles\n')
+    logger.info(f"Rebuilt related-articles index for {count} articles")
+    return count
@@ -0,0 +1,150 @@
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+
+from django.db import transaction
+from django.db.models import Subquery
+
+from .models import Article, ArticleRevision
+
+# Every SNAPSHOT_INTERVAL-th revision stores the full content, which bounds the
+# number of diffs replayed to rebuild any version.
+SNAPSHOT_INTERVAL = 10
+
+# Fields stored whole with every revision (content is diffed separately).
+VERSIONED_FIELDS = [
+    'title', 'excerpt', 'subcategory', 'featuredImage', 'gallery', 'tags', 'status',
+    'isFeatured', 'isHot', 'isTrending', 'isBreaking', 'seoTitle', 'seoDescription', 'seoKeywords',
+]
+RESTORABLE_FIELDS = [f for f in VERSIONED_FIELDS if f not in ('isFeatured', 'isHot', 'isTrending', 'isBreaking')]
+
+# Split HTML into tags, whitespace runs and words, so edits diff at word level
+# even when the whole body sits on one line. A '<' that opens no tag is a token
+# of its own, which keeps tokenizing lossless.
+TOKEN_RE = re.compile(r'<[^>]*>|\s+|[^<\s]+|<')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text)
+
+
+def make_delta(old, new):
+    """Replacement ops turning ``old`` into ``new``: [[start, end, replacement tokens], ...]."""
+    old_tokens, new_tokens = tokenize(old), tokenize(new)
+    matcher = SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    return [
+        [i1, i2, new_tokens[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+
+
+def apply_delta(old, delta):
+    tokens = tokenize(old)
+    parts = []
+    position = 0
+    for start, end, replacement in delta:
+        parts.extend(tokens[position:start])
+        parts.extend(replacement)
+        position = end
+    parts.extend(tokens[position:])
+    return ''.join(parts)
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+
+def _fields(article):
+    return {name: getattr(article, name) for name in VERSIONED_FIELDS}
+
+
+def rebuild_content(article_id, number):
+    """Content of revision ``number``: the nearest snapshot at or before it, plus the diffs after it."""
+    revisions = list(
+        ArticleRevision.objects.filter(
+            article_id=article_id, number__lte=number,
+            number__gte=Subquery(ArticleRevision.objects.filter(
+                article_id=article_id, number__lte=number, is_snapshot=True
+            ).order_by('-number').values('number')[:1]),
+        ).order_by('number').values_list('is_snapshot', 'content_data')
+    )
+    content = None
+    for is_snapshot, data in revisions:
+        content = _unpack(data) if is_snapshot else apply_delta(content, _unpack(data))
+    return content
+
+
+def lock(article):
+    """
+    Lock the article row until the surrounding transaction ends, so concurrent
+    edits number their revisions one at a time (locking the revision rows
+    wouldn't cover an article that has none yet).
+    """
+    list(Article.objects.select_for_update().filter(pk=article.pk).values_list('pk', flat=True))
+
+
+def ensure_baseline(article):
+    """Before the first edit of an article that predates revision history, keep its current state as v1."""
+    with transaction.atomic():
+        lock(article)
+        if not ArticleRevision.objects.filter(article=article).exists():
+            record(article)
+
+
+def record(article, editor=None):
+    """Store the current state of ``article`` as a new revision, unless nothing versioned changed."""
+    with transaction.atomic():
+        lock(article)
+        last = ArticleRevision.objects.filter(article=article).order_by('-number').only('number', 'fields').first()
+        fields = json.loads(json.dumps(_fields(article), default=str))
+        if last is None:
+            return ArticleRevision.objects.create(
+                article=article, number=1, is_snapshot=True,
+                content_data=_pack(article.content), fields=fields, editor=editor,
+            )
+        previous = rebuild_content(article.pk, last.number)
+        if previous == article.content and last.fields == fields:
+            return last
+        number = last.number + 1
+        is_snapshot = number % SNAPSHOT_INTERVAL == 1
+        data = _pack(article.content) if is_snapshot else _pack(make_delta(previous, article.content))
+        return ArticleRevision.objects.create(
+            article=article, number=number, is_snapshot=is_snapshot,
+            content_data=data, fields=fields, editor=editor,
+        )
+
+
+def version(article_id, number):
+    """The article fields and content as of revision ``number``, or None if it doesn't exist."""
+    revision = ArticleRevision.objects.filter(article_id=article_id, number=number).first()
+    if revision is None:
+        return None
+    return dict(revision.fields, content=rebuild_content(article_id, number), number=number)
+
+
+def restore(article, number, editor=None):
+    """Bring ``article`` back to revision ``number``; the restore itself becomes a new revision."""
+    with transaction.atomic():
+        lock(article)
+        data = version(article.pk, number)
+        if data is None:
+            return None
+        article.content = data['content']
+        for name in RESTORABLE_FIELDS:
+            if name in data:
+                setattr(article, name, data[name])
+        article.save()
+        return record(article, editor)
+
+
+def storage_size(article_id):
+    """Bytes stored for the history of one article."""
+    return sum(
+        len(data) + len(json.dumps(fields, ensure_ascii=False).encode('utf-8'))
+        for data, fields in ArticleRevision.objects.filter(article_id=article_id).values_list('content_data', 'fields')
+    )
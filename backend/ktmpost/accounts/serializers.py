@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 import logging
-from .models import CustomUser, Writer, Category, Article
+from .models import CustomUser, Writer, Category, Article, Tag
 from rest_framework import serializers
 from .models import Video, VideoCategory
+from .metrics import TimedSerializerMixin
+from .taxonomy import is_valid_subcategory
+from .authors import profile_stats
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +22,7 @@ class LoginSerializer(serializers.Serializer):
         logger.warning(f"Authentication failed for username: {data['username']}")
         raise serializers.ValidationError("Invalid credentials")
 
-class WriterSerializer(serializers.ModelSerializer):
+class WriterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     expertise = serializers.ListField(child=serializers.CharField(), required=False)
     social_links = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False)
 
@@ -32,8 +35,23 @@ class WriterSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'join_date', 'articles_count']
 
+class WriterProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Public author page: the writer's public details plus their precomputed article aggregates."""
 
-class CategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Writer
+        fields = [
+            'id', 'name', 'role', 'department', 'expertise', 'bio', 'location',
+            'social_links', 'avatar', 'join_date'
+        ]
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        representation['stats'] = profile_stats(instance)
+        return representation
+
+
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     subcategories = serializers.ListField(child=serializers.CharField(), required=False)
 
     class Meta:
@@ -45,7 +63,7 @@ class CategorySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'createdAt', 'articlesCount']
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     tags = serializers.ListField(child=serializers.CharField(), required=False)
     gallery = serializers.ListField(child=serializers.DictField(), required=False)
     featuredImage = serializers.URLField(allow_null=True, required=False)
@@ -56,20 +74,18 @@ class ArticleSerializer(serializers.ModelSerializer):
             'id', 'title', 'excerpt', 'content', 'category', 'subcategory', 'author',
             'featuredImage', 'gallery', 'tags', 'status', 'isFeatured', 'isHot',
             'isTrending', 'isBreaking', 'publishDate', 'publishTime', 'seoTitle',
-            'seoDescription', 'seoKeywords', 'readTime', 'views', 'createdAt', 'updatedAt'
+            'seoDescription', 'seoKeywords', 'readTime', 'contentHtml', 'views', 'createdAt', 'updatedAt'
         ]
-        read_only_fields = ['id', 'createdAt', 'updatedAt', 'readTime', 'views']
+        read_only_fields = ['id', 'createdAt', 'updatedAt', 'readTime', 'contentHtml', 'views']
 
     def validate(self, data):
         if data.get('subcategory') and data.get('category'):
-            if data['subcategory'] not in data['category'].subcategories:
+            if not is_valid_subcategory(data['category'], data['subcategory']):
                 raise serializers.ValidationError({
                     'subcategory': f"Subcategory '{data['subcategory']}' is not valid for category '{data['category'].name}'."
                 })
         if not data.get('title'):
             raise serializers.ValidationError({'title': 'Title is required.'})
-        if not data.get('excerpt'):
-            raise serializers.ValidationError({'excerpt': 'Excerpt is required.'})
         if not data.get('content'):
             raise serializers.ValidationError({'content': 'Content is required.'})
         if not data.get('category'):
@@ -91,13 +107,43 @@ class ArticleSerializer(serializers.ModelSerializer):
         }
         return representation
 
+class ArticleListSerializer(ArticleSerializer):
+    """Article listing requested with ?omit=content: the rendered contentHtml without the raw content."""
+
+    class Meta(ArticleSerializer.Meta):
+        fields = [f for f in ArticleSerializer.Meta.fields if f != 'content']
+
+class ArticleSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Compact article representation for listings that don't need the body."""
+
+    class Meta:
+        model = Article
+        fields = [
+            'id', 'title', 'excerpt', 'featuredImage', 'subcategory', 'tags',
+            'publishDate', 'publishTime', 'views'
+        ]
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        representation['category'] = {
+            'id': instance.category.id,
+            'name': instance.category.name,
+        }
+        return representation
+
+
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['name', 'articlesCount']
+
 
-class VideoCategorySerializer(serializers.ModelSerializer):
+class VideoCategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = VideoCategory
         fields = ['id', 'name', 'description', 'isActive', 'createdAt']
 
-class VideoSerializer(serializers.ModelSerializer):
+class VideoSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Video
         fields = [
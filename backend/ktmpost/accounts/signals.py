@@ -0,0 +1,111 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import archive, authors, category_tree, purge, related, taxonomy
+from .feeds import invalidate_feeds
+from .models import Article, Category, Video, Writer
+
+
+@receiver(pre_save, sender=Article)
+def remember_previous_state(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None:
+        previous = Article.objects.filter(pk=instance.pk).values('subcategory', *authors.STATE_FIELDS).first()
+    instance._previous_category_id = previous['category_id'] if previous else None
+    instance._previous_tree_state = (
+        (previous['category_id'], previous['subcategory'], previous['status']) if previous else None
+    )
+    instance._previous_state = (
+        {name: previous[name] for name in authors.STATE_FIELDS} if previous else None
+    )
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_changed(sender, instance, **kwargs):
+    category_ids = {instance.category_id, getattr(instance, '_previous_category_id', None)} - {None}
+    invalidate_feeds(category_ids)
+    purge.purge(purge.article_keys(instance.pk, *category_ids))
+
+
+@receiver(post_save, sender=Article)
+def refresh_category_tree(sender, instance, **kwargs):
+    # Only the published counts per category and subcategory appear in the tree.
+    previous = getattr(instance, '_previous_tree_state', None)
+    current = (instance.category_id, instance.subcategory, instance.status)
+    if previous != current and 'published' in (current[2], previous and previous[2]):
+        category_tree.invalidate()
+
+
+@receiver(post_delete, sender=Article)
+def release_from_category_tree(sender, instance, **kwargs):
+    if instance.status == 'published':
+        category_tree.invalidate()
+
+
+@receiver(post_save, sender=Article)
+def update_writer_stats(sender, instance, **kwargs):
+    authors.apply_change(getattr(instance, '_previous_state', None), authors.state(instance))
+
+
+@receiver(post_delete, sender=Article)
+def remove_from_writer_stats(sender, instance, **kwargs):
+    authors.apply_change(authors.state(instance), None)
+
+
+@receiver(post_save, sender=Article)
+def update_archive(sender, instance, **kwargs):
+    archive.apply_change(getattr(instance, '_previous_state', None), authors.state(instance))
+
+
+@receiver(post_delete, sender=Article)
+def remove_from_archive(sender, instance, **kwargs):
+    archive.apply_change(authors.state(instance), None)
+
+
+@receiver(post_save, sender=Article)
+def reindex_related(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    related.index_article(instance, was_published=bool(previous) and previous['status'] == 'published')
+
+
+@receiver(pre_delete, sender=Article)
+def drop_related(sender, instance, **kwargs):
+    instance._related_holders = related.drop_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def refill_related(sender, instance, **kwargs):
+    related.refill(getattr(instance, '_related_holders', []))
+
+
+@receiver(post_delete, sender=Article)
+def release_tags(sender, instance, **kwargs):
+    if instance.status == 'published':
+        taxonomy.adjust_tag_counts(removed=taxonomy.clean_tags(instance.tags))
+
+
+@receiver(post_save, sender=Category)
+def mirror_subcategories(sender, instance, **kwargs):
+    taxonomy.sync_subcategories(instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_feeds([instance.pk])
+    category_tree.invalidate()
+    purge.purge(['home', f'category:{instance.pk}'])
+
+
+@receiver(post_save, sender=Writer)
+@receiver(post_delete, sender=Writer)
+def writer_changed(sender, instance, **kwargs):
+    # Author pages are cached under 'home'.
+    purge.purge(['home'])
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def video_changed(sender, instance, **kwargs):
+    purge.purge(['video-live'])
@@ -0,0 +1,244 @@
+"""
+Static export of the public read API, so a CDN can serve it as flat files.
+
+Each resource is written to ``<output>/<path under /api/>`` (``index.json``
+for directory-style URLs) together with precompressed ``.gz``, ``.br`` and
+``.zst`` variants. Article detail pages are rendered in a process pool and
+only when their ``updatedAt`` differs from the previous run's manifest, so
+they leave out ``views``, which changes without touching ``updatedAt``. The
+listings, feeds and sitemaps are cheap and are rendered every run; files the
+previous run wrote that the current one doesn't (a deactivated category, a
+sitemap page past the end) are deleted.
+
+Two resources exist only in the export: ``home/index.json`` bundles what the
+front page needs in one file, and ``categories/<id>/latest/index.json`` holds
+each category's newest articles.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+import django
+from django.db import connections
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from . import compression, feeds
+from .models import Article, Category, Video, Writer
+from .serializers import ArticleSerializer, ArticleSummarySerializer, VideoSerializer
+from .views import CategoryListCreateView, CategoryTreeView, LiveVideoListView, SubcategoryListView
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '.snapshot-manifest.json'
+MANIFEST_VERSION = 1
+# Articles rendered per pool task.
+CHUNK_SIZE = 50
+LIST_SIZE = 20
+
+# File suffix -> one-shot compressor. Files are compressed once and served
+# many times, so they get the highest levels rather than the on-the-fly ones.
+PRECOMPRESSED = {'.gz': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if compression.brotli is not None:
+    PRECOMPRESSED['.br'] = lambda data: compression.brotli.compress(data, quality=11)
+if compression.zstandard is not None:
+    PRECOMPRESSED['.zst'] = lambda data: compression.zstandard.ZstdCompressor(level=19).compress(data)
+
+
+class SnapshotError(Exception):
+    """A page rendered with something other than 200 OK; nothing of it is written."""
+
+
+def article_path(pk):
+    return f'articles/{pk}/index.json'
+
+
+def render_json(data):
+    return JSONRenderer().render(data)
+
+
+def write(root, path, body):
+    """
+    Write ``body`` and its precompressed variants to ``root/path``. Returns
+    False, touching nothing, when the file already holds ``body`` so unchanged
+    files keep their mtime for the CDN sync.
+    """
+    target = os.path.join(root, path)
+    try:
+        with open(target, 'rb') as fh:
+            if fh.read() == body:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # The plain file goes last: it is what marks the set as up to date.
+    for suffix, encode in [*PRECOMPRESSED.items(), ('', None)]:
+        tmp = f'{target}{suffix}.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.write(body if encode is None else encode(body))
+        os.replace(tmp, target + suffix)
+    return True
+
+
+def remove(root, path):
+    for suffix in ['', *PRECOMPRESSED]:
+        try:
+            os.remove(os.path.join(root, path) + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def render_articles(root, ids):
+    """Write the detail file of each published article in ``ids``; returns the number of files changed."""
+    articles = Article.objects.filter(pk__in=ids, status='published').select_related('category', 'author')
+    written = 0
+    for article in articles:
+        data = ArticleSerializer(article).data
+        del data['views']
+        written += write(root, article_path(article.pk), render_json(data))
+    return written
+
+
+def _init_worker():
+    # A no-op in forked workers; spawned ones start with an empty app registry.
+    django.setup()
+
+
+def dependencies():
+    """
+    Fingerprint of the rows article details embed besides the article itself;
+    renaming a category or writer doesn't touch ``updatedAt``.
+    """
+    rows = [
+        list(Category.objects.order_by('pk').values_list('pk', 'name', 'subcategories')),
+        list(Writer.objects.order_by('pk').values_list('pk', 'name')),
+    ]
+    return hashlib.sha256(json.dumps(rows, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def save_manifest(root, manifest):
+    target = os.path.join(root, MANIFEST_NAME)
+    with open(f'{target}.tmp', 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh)
+    os.replace(f'{target}.tmp', target)
+
+
+def latest(queryset):
+    articles = (queryset.filter(status='published').select_related('category')
+                .order_by('-publishDate', '-publishTime')[:LIST_SIZE])
+    return ArticleSummarySerializer(articles, many=True).data
+
+
+def render_pages(root, base_url):
+    """
+    Write the listings, feeds and sitemaps; returns (number of files changed,
+    paths written). Raises SnapshotError, before writing any of them, if a
+    view doesn't answer 200.
+    """
+    # The views run in-process; the anonymous rate limit would throttle the export itself.
+    with override_settings(RATE_LIMIT_ENABLED=False):
+        pages = _render_pages(base_url)
+    return sum(write(root, path, body) for path, body in pages.items()), sorted(pages)
+
+
+def _render_pages(base_url):
+    url = urlsplit(base_url)
+    factory = RequestFactory(HTTP_HOST=url.netloc)
+    secure = url.scheme == 'https'
+
+    def get(view, path, **kwargs):
+        response = view(factory.get(f'/api/{path}', secure=secure), **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.status_code != 200:
+            raise SnapshotError(f'/api/{path} answered {response.status_code}')
+        return response.content
+
+    pages = {
+        'categories/index.json': get(CategoryListCreateView.as_view(), 'categories/'),
+        'categories/tree/index.json': get(CategoryTreeView.as_view(), 'categories/tree/'),
+        'videos/live/index.json': get(LiveVideoListView.as_view(), 'videos/live/'),
+        'sitemap.xml': get(feeds.sitemap_index, 'sitemap.xml'),
+        'sitemap-categories.xml': get(feeds.category_sitemap, 'sitemap-categories.xml'),
+        'news-sitemap.xml': get(feeds.news_sitemap, 'news-sitemap.xml'),
+    }
+    for page in range(1, feeds.sitemap_pages() + 1):
+        name = f'sitemap-articles-{page}.xml'
+        pages[name] = get(feeds.article_sitemap, name, page=page)
+
+    for pk in Category.objects.filter(isActive=True).order_by('order', 'pk').values_list('pk', flat=True):
+        pages[f'categories/{pk}/latest/index.json'] = render_json(latest(Article.objects.filter(category_id=pk)))
+        pages[f'categories/{pk}/subcategories/index.json'] = get(
+            SubcategoryListView.as_view(), f'categories/{pk}/subcategories/', pk=pk)
+        for kind in ('rss', 'atom'):
+            pages[f'feeds/categories/{pk}/{kind}/index.xml'] = get(
+                feeds.category_feed, f'feeds/categories/{pk}/{kind}/', pk=pk, kind=kind)
+
+    articles = Article.objects.all()
+    pages['home/index.json'] = render_json({
+        'categories': json.loads(pages['categories/tree/index.json']),
+        'latest': latest(articles),
+        'breaking': latest(articles.filter(isBreaking=True)),
+        'featured': latest(articles.filter(isFeatured=True)),
+        'live': VideoSerializer(Video.objects.filter(is_live=True, status='live').order_by('-live_start_time'),
+                                many=True).data,
+    })
+    return pages
+
+
+def export(root, base_url='http://localhost', workers=None, full=False):
+    """
+    Bring the static tree under ``root`` up to date and return a summary
+    ({'articles': rendered, 'removed': files deleted, 'written': files
+    changed}). ``full`` ignores the previous manifest and re-renders every
+    article.
+    """
+    os.makedirs(root, exist_ok=True)
+    manifest = load_manifest(root) or {'articles': {}}
+    fingerprint = dependencies()
+    previous = manifest['articles'] if not full and manifest.get('dependencies') == fingerprint else {}
+
+    current = {
+        str(pk): updated.isoformat()
+        for pk, updated in Article.objects.filter(status='published').values_list('pk', 'updatedAt').iterator()
+    }
+    changed = sorted((int(pk) for pk, stamp in current.items() if previous.get(pk) != stamp))
+    removed = [pk for pk in manifest['articles'] if pk not in current]
+    for pk in removed:
+        remove(root, article_path(pk))
+
+    chunks = [changed[i:i + CHUNK_SIZE] for i in range(0, len(changed), CHUNK_SIZE)]
+    if workers == 1 or len(chunks) <= 1:
+        written = sum(render_articles(root, chunk) for chunk in chunks)
+    else:
+        # Forked workers must open their own database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            written = sum(pool.map(partial(render_articles, root), chunks))
+    pages_written, pages = render_pages(root, base_url)
+    written += pages_written
+    stale = set(manifest.get('pages', [])) - set(pages)
+    for path in stale:
+        remove(root, path)
+    removed += sorted(stale)
+
+    save_manifest(root, {
+        'version': MANIFEST_VERSION, 'dependencies': fingerprint, 'articles': current, 'pages': pages,
+    })
+    logger.info(f"Snapshot in {root}: {len(changed)} articles rendered, {len(removed)} files removed, {written} files written")
+    return {'articles': len(changed), 'removed': len(removed), 'written': written}
@@ -0,0 +1,44 @@
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def iter_json_array(queryset, serializer, chunk_size=500):
+    """
+    Yield a JSON array of the serialized queryset in chunks of ``chunk_size`` rows.
+    Rows are read with .iterator(), so neither the model instances nor the
+    encoded document are ever held in memory as a whole.
+    """
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    buffer = ['[']
+    first = True
+    for count, instance in enumerate(queryset.iterator(chunk_size=chunk_size), start=1):
+        if not first:
+            buffer.append(',')
+        buffer.append(encoder.encode(serializer.to_representation(instance)))
+        first = False
+        if count % chunk_size == 0:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+    buffer.append(']')
+    yield ''.join(buffer).encode('utf-8')
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    def __init__(self, queryset, serializer, chunk_size=500, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(iter_json_array(queryset, serializer, chunk_size), **kwargs)
+
+
+class StreamingListMixin:
+    """
+    List mixin for generic views that streams unpaginated GET responses row by
+    row instead of building the whole list and JSON document in memory.
+    """
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        return StreamingJSONResponse(queryset, serializer, chunk_size=self.stream_chunk_size)
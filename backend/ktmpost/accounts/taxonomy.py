@@ -0,0 +1,92 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F
+
+from .models import Article, ArticleTag, Category, Subcategory, Tag
+
+
+def clean_tags(tags):
+    return {str(tag)[:255] for tag in tags or [] if tag}
+
+
+def adjust_tag_counts(added=(), removed=()):
+    """
+    Count one more published article for each occurrence of a name in ``added``
+    and one fewer for each in ``removed``, with one UPDATE per distinct change.
+    """
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    by_delta = defaultdict(list)
+    for name, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(name)
+    created = [name for name, delta in deltas.items() if delta > 0]
+    if created:
+        Tag.objects.bulk_create([Tag(name=name) for name in created], ignore_conflicts=True)
+    for delta, names in by_delta.items():
+        Tag.objects.filter(name__in=names).update(articlesCount=F('articlesCount') + delta)
+
+
+def sync_tags(article, was_published=None):
+    """
+    Mirror ``article.tags`` into ArticleTag rows and keep Tag.articlesCount, the
+    number of published articles with the tag, current. ``was_published`` is
+    whether the article counted before this change; by default its status is
+    taken as unchanged.
+    """
+    tags = clean_tags(article.tags)
+    existing = set(ArticleTag.objects.filter(article=article).values_list('name', flat=True))
+    if existing - tags:
+        ArticleTag.objects.filter(article=article, name__in=existing - tags).delete()
+    ArticleTag.objects.bulk_create([ArticleTag(article=article, name=name) for name in tags - existing])
+    if was_published is None:
+        was_published = article.status == 'published'
+    counted = existing if was_published else set()
+    counting = tags if article.status == 'published' else set()
+    adjust_tag_counts(counting - counted, counted - counting)
+
+
+def sync_subcategories(category):
+    """Mirror ``category.subcategories`` into Subcategory rows."""
+    names = []
+    for name in category.subcategories or []:
+        name = str(name)[:255]
+        if name and name not in names:
+            names.append(name)
+    existing = {row.name: row for row in Subcategory.objects.filter(category=category)}
+    Subcategory.objects.filter(category=category).exclude(name__in=names).delete()
+    for order, name in enumerate(names):
+        row = existing.get(name)
+        if row is None:
+            Subcategory.objects.create(category=category, name=name, order=order)
+        elif row.order != order:
+            Subcategory.objects.filter(pk=row.pk).update(order=order)
+
+
+def is_valid_subcategory(category, name):
+    return Subcategory.objects.filter(category=category, name=name).exists()
+
+
+def rebuild():
+    """Recreate Subcategory rows and Tag counts from the JSON fields, e.g. after bulk loads."""
+    for category in Category.objects.only('id', 'subcategories').iterator():
+        sync_subcategories(category)
+    counts = dict(
+        ArticleTag.objects.filter(article__status='published').values_list('name').annotate(n=Count('id')).order_by()
+    )
+    Tag.objects.bulk_create([Tag(name=name) for name in counts], ignore_conflicts=True)
+    for tag in Tag.objects.only('id', 'name', 'articlesCount').iterator():
+        if tag.articlesCount != counts.get(tag.name, 0):
+            Tag.objects.filter(pk=tag.pk).update(articlesCount=counts.get(tag.name, 0))
+
+
+def subcategory_counts(category):
+    """Subcategories of ``category`` in order, with their published article counts."""
+    counts = dict(
+        Article.objects.filter(category=category, status='published').exclude(subcategory='')
+        .values_list('subcategory').annotate(n=Count('id')).order_by()
+    )
+    return [
+        {'name': name, 'articlesCount': counts.get(name, 0)}
+        for name in Subcategory.objects.filter(category=category).order_by('order').values_list('name', flat=True)
+    ]
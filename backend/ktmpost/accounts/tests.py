@@ -1,3 +1,1054 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date, time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from . import archive, authors, benchmark, category_tree, compression, content, revisions, snapshot
+from .metrics import registry
+from .trending import TrendingEngine
+from .views import UploadView
+from .models import (
+    Article, ArticleRevision, ArticleTag, Category, CustomUser, RelatedArticle, Subcategory, Tag, Video, Writer,
+)
+
+
+def full_table_scans(sql):
+    """Return the EXPLAIN rows for ``sql`` that read a table without an index."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            details = [row[-1] for row in cursor.fetchall()]
+            return [d for d in details if d.startswith('SCAN') and 'USING' not in d]
+        if connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql)
+            columns = [col[0] for col in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [row for row in rows if row['type'] == 'ALL']
+        cursor.execute('EXPLAIN ' + sql)
+        return [row[0] for row in cursor.fetchall() if 'Seq Scan' in row[0]]
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(
+            name='राजनीति', nameEnglish='Politics', subcategories=['संसद'], order=1
+        )
+        cls.writer = Writer.objects.create(
+            name='लेखक', email='writer@example.com', role='Reporter', department='News'
+        )
+        for i in range(5):
+            cls.article = Article.objects.create(
+                title=f'समाचार {i}', excerpt='सार', content='<p>सामग्री</p>', subcategory='संसद',
+                category=cls.category, author=cls.writer, status='published', tags=['निर्वाचन'],
+                publishDate=date(2025, 8, 28), publishTime=time(9, i),
+            )
+
+    def assertNoFullScans(self, queries):
+        for query in queries:
+            scans = full_table_scans(query['sql'])
+            self.assertEqual(scans, [], f"Full table scan in: {query['sql']}")
+
+    def test_public_endpoints_use_indexes(self):
+        client = APIClient()
+        urls = [
+            '/api/categories/',
+            '/api/articles/',
+            f'/api/articles/{self.article.pk}/',
+            f'/api/articles/{self.article.pk}/related/',
+            '/api/articles/trending/',
+            f'/api/categories/{self.category.pk}/subcategories/',
+            f'/api/categories/{self.category.pk}/subcategories/संसद/articles/',
+            '/api/tags/',
+            '/api/tags/निर्वाचन/articles/',
+            '/api/archive/',
+            '/api/archive/2025/',
+            '/api/archive/2025/8/',
+            f'/api/archive/2025/8/?category={self.category.pk}',
+            '/api/archive/2025/8/28/articles/',
+            f'/api/writers/{self.writer.pk}/profile/',
+            f'/api/writers/{self.writer.pk}/articles/',
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNoFullScans(ctx.captured_queries)
+
+    def test_featured_rotation_uses_index(self):
+        if connection.vendor == 'sqlite':
+            self.skipTest('SQLite gets a bare boolean column test, which no index serves; '
+                          'MySQL compares isFeatured = 1 and uses article_featured_idx.')
+        # The query Article.save runs to keep at most three featured articles.
+        with CaptureQueriesContext(connection) as ctx:
+            list(Article.objects.filter(isFeatured=True).exclude(pk=self.article.pk).order_by('-updatedAt'))
+        self.assertNoFullScans(ctx.captured_queries)
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0)
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+
+    def test_sampled_request_is_recorded(self):
+        Category.objects.create(name='खेल', nameEnglish='Sports')
+        self.client.get('/api/categories/')
+        admin = CustomUser.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_authenticate(admin)
+        body = self.client.get('/api/_metrics/').content.decode()
+        self.assertIn('ktmpost_sql_queries_count{view="category-list-create",method="GET"} 1', body)
+        self.assertIn('# TYPE ktmpost_serializer_time_seconds histogram', body)
+
+    def test_streamed_list_queries_are_recorded(self):
+        category = Category.objects.create(name='खेल', nameEnglish='Sports')
+        writer = Writer.objects.create(name='लेखक', email='metrics@example.com', role='Reporter', department='News')
+        Article.objects.create(title='लेख', content='सामग्री', category=category, author=writer)
+        response = self.client.get('/api/articles/')
+        self.assertNotIn('ktmpost_sql_queries_count', registry.render_prometheus())
+        b''.join(response.streaming_content)
+        body = registry.render_prometheus()
+        self.assertIn('ktmpost_sql_queries_count{view="article-list-create",method="GET"} 1', body)
+        self.assertIn('ktmpost_sql_queries_sum{view="article-list-create",method="GET"} 1', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0)
+    def test_metrics_endpoint_is_admin_only(self):
+        viewer = CustomUser.objects.create_user('viewer', 'viewer@example.com', 'pass')
+        self.client.force_authenticate(viewer)
+        self.assertEqual(self.client.get('/api/_metrics/').status_code, 403)
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run_small_baseline(self):
+        benchmark.seed(articles=30, writers=5, categories=3, videos=3, batch_size=10)
+        self.assertEqual(Article.objects.count(), 30)
+        self.assertEqual(sum(Category.objects.values_list('articlesCount', flat=True)), 30)
+        self.assertFalse(Article.objects.filter(contentHtml='').exists())
+        self.assertFalse(Article.objects.filter(readTime=0).exists())
+
+        report = benchmark.run(requests=3, concurrency=1, only=['article-list', 'article-detail', 'login'])
+        self.assertEqual(set(report['scenarios']), {'article-list', 'article-detail', 'login'})
+        for result in report['scenarios'].values():
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['queries_avg'], 0)
+        self.assertEqual(benchmark.compare(report, report), [])
+
+    @override_settings(DEBUG=False)
+    def test_seed_command_refuses_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('seed_benchmark', articles=1, writers=1, categories=1, videos=0)
+        self.assertFalse(CustomUser.objects.filter(username=benchmark.BENCH_USERNAME).exists())
+
+
+class BulkImportExportTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='अर्थ', nameEnglish='Economy', subcategories=['बजार'])
+        self.writer = Writer.objects.create(name='लेखक', email='bulk@example.com', role='Reporter', department='News')
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('editor', 'editor@example.com', 'pass'))
+
+    def test_import_batches_and_export_round_trip(self):
+        rows = [
+            {'title': f'शीर्षक {i}', 'excerpt': 'सार', 'content': '<p>सामग्री</p>', 'category': self.category.pk,
+             'author': self.writer.pk, 'subcategory': 'बजार', 'status': 'published', 'isFeatured': True}
+            for i in range(5)
+        ]
+        body = '\n'.join(json.dumps(row) for row in rows) + '\n{"title": "missing fields"}\nnot json\n'
+        response = self.client.generic(
+            'POST', '/api/articles/bulk/?batch_size=2', body.encode(), content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual([e['line'] for e in response.data['errors']], [6, 7])
+
+        self.category.refresh_from_db()
+        self.writer.refresh_from_db()
+        self.assertEqual(self.category.articlesCount, 5)
+        self.assertEqual(self.writer.articles_count, 5)
+        self.assertEqual(Article.objects.filter(isFeatured=True).count(), 3)
+
+        base = {'content': '<p>सामग्री</p>', 'category': self.category.pk, 'author': self.writer.pk}
+        bad_rows = [
+            {**base, 'title': 'x' * 300},
+            {**base, 'title': 'null date', 'publishDate': None},
+            {**base, 'title': 'list category', 'category': [self.category.pk]},
+            {**base, 'title': 'dict author', 'author': {'id': self.writer.pk}},
+            {**base, 'title': 'bad date', 'publishDate': {'day': 1}},
+        ]
+        response = self.client.generic(
+            'POST', '/api/articles/bulk/', '\n'.join(json.dumps(row) for row in bad_rows).encode(),
+            content_type='application/x-ndjson',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual([e['line'] for e in response.data['errors']], [1, 2, 3, 4, 5])
+        self.assertTrue(response.data['errors'][0]['error'].startswith('title:'))
+
+        row = json.dumps({**base, 'title': 'null excerpt', 'excerpt': None})
+        response = self.client.generic('POST', '/api/articles/bulk/', row.encode(), content_type='application/x-ndjson')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(Article.objects.get(title='null excerpt').excerpt, 'सामग्री')
+
+        # MySQL's bulk_create doesn't return primary keys; the tags must still be indexed.
+        row = json.dumps({**base, 'title': 'tagged', 'tags': ['बजेट']})
+        Article.objects.create(**{**base, 'category': self.category, 'author': self.writer, 'title': 'tagged'})
+        with patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            response = self.client.generic('POST', '/api/articles/bulk/', row.encode(),
+                                           content_type='application/x-ndjson')
+        self.assertEqual(response.data['created'], 1)
+        imported = Article.objects.filter(title='tagged').latest('pk')
+        self.assertEqual(list(ArticleTag.objects.filter(name='बजेट').values_list('article_id', flat=True)),
+                         [imported.pk])
+
+        response = self.client.get('/api/articles/export/')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 8)
+        exported = json.loads(lines[0])
+        self.assertEqual((exported['title'], exported['category']), ('शीर्षक 0', self.category.pk))
+
+
+class StreamingListTests(TestCase):
+    def test_article_list_streams_in_chunks(self):
+        category = Category.objects.create(name='विश्व', nameEnglish='World')
+        writer = Writer.objects.create(name='लेखक', email='stream@example.com', role='Reporter', department='News')
+        for i in range(7):
+            Article.objects.create(title=f'लेख {i}', excerpt='सार', content='सामग्री', category=category, author=writer)
+
+        with patch('accounts.views.ArticleListCreateView.stream_chunk_size', 3):
+            response = APIClient().get('/api/articles/')
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)
+        data = json.loads(b''.join(chunks))
+        self.assertEqual(len(data), 7)
+        self.assertEqual(data[0]['category']['name'], 'विश्व')
+        self.assertEqual((data[0]['content'], data[0]['contentHtml']), ('सामग्री', 'सामग्री'))
+
+        data = json.loads(b''.join(APIClient().get('/api/articles/?omit=content').streaming_content))
+        self.assertNotIn('content', data[0])
+        self.assertEqual(data[0]['contentHtml'], 'सामग्री')
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='समाज', nameEnglish='Society')
+        self.writer = Writer.objects.create(name='लेखक', email='feed@example.com', role='Reporter', department='News')
+        self.article = Article.objects.create(
+            title='पहिलो समाचार', excerpt='सार', content='सामग्री', category=self.category,
+            author=self.writer, status='published',
+        )
+
+    def test_category_feeds_are_cached_until_an_article_changes(self):
+        client = APIClient()
+        url = f'/api/feeds/categories/{self.category.pk}/rss/'
+        self.assertContains(client.get(url), 'पहिलो समाचार')
+        self.assertIn('atom', client.get(f'/api/feeds/categories/{self.category.pk}/atom/')['Content-Type'])
+
+        with self.assertNumQueries(0):
+            client.get(url)
+
+        self.article.title = 'अद्यावधिक समाचार'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        self.assertContains(client.get(url), 'अद्यावधिक समाचार')
+
+    def test_sitemaps_are_paged(self):
+        client = APIClient()
+        with patch('accounts.feeds.SITEMAP_PAGE_SIZE', 1):
+            Article.objects.create(
+                title='दोस्रो', excerpt='सार', content='सामग्री', category=self.category,
+                author=self.writer, status='published',
+            )
+            index = client.get('/api/sitemap.xml').content.decode()
+            self.assertIn('sitemap-articles-2.xml', index)
+            self.assertEqual(client.get('/api/sitemap-articles-3.xml').status_code, 404)
+            client.get('/api/sitemap-articles-2.xml')
+            with self.assertNumQueries(0):
+                client.get('/api/sitemap.xml')
+                client.get('/api/sitemap-articles-2.xml')
+        self.assertContains(client.get('/api/news-sitemap.xml'), '<news:title>पहिलो समाचार</news:title>')
+
+
+class RelatedArticlesTests(TestCase):
+    def setUp(self):
+        self.politics = Category.objects.create(name='राजनीति', nameEnglish='Politics', subcategories=['संसद'])
+        self.sports = Category.objects.create(name='खेल', nameEnglish='Sports')
+        self.writer = Writer.objects.create(name='लेखक', email='related@example.com', role='Reporter', department='News')
+
+    def make(self, title, category, tags, **extra):
+        return Article.objects.create(
+            title=title, excerpt='सार', content='सामग्री', category=category, author=self.writer,
+            status='published', tags=tags, **extra
+        )
+
+    def test_related_list_is_scored_and_maintained_on_save(self):
+        source = self.make('स्रोत', self.politics, ['निर्वाचन', 'संसद'], subcategory='संसद')
+        best = self.make('दुवै ट्याग', self.politics, ['निर्वाचन', 'संसद'], subcategory='संसद')
+        tag_only = self.make('एउटा ट्याग', self.sports, ['निर्वाचन'])
+        self.make('असम्बन्धित', self.sports, ['क्रिकेट'])
+
+        client = APIClient()
+        with self.assertNumQueries(1):
+            response = client.get(f'/api/articles/{source.pk}/related/')
+        self.assertEqual([a['id'] for a in response.data], [best.pk, tag_only.pk])
+
+        tag_only.status = 'draft'
+        tag_only.save()
+        response = client.get(f'/api/articles/{source.pk}/related/')
+        self.assertEqual([a['id'] for a in response.data], [best.pk])
+        self.assertEqual(set(ArticleTag.objects.filter(article=source).values_list('name', flat=True)), {'निर्वाचन', 'संसद'})
+
+    @patch('accounts.related.RELATED_LIMIT', 2)
+    def test_editing_an_article_keeps_other_lists_full(self):
+        edited = self.make('सम्पादित', self.politics, ['निर्वाचन', 'संसद', 'बजेट'], subcategory='संसद')
+        closer = [self.make(f'नजिक {i}', self.politics, ['निर्वाचन', 'संसद'], subcategory='संसद') for i in range(2)]
+        neighbour = self.make('छिमेकी', self.sports, ['निर्वाचन', 'बजेट'])
+
+        def related_ids(article):
+            return set(RelatedArticle.objects.filter(article=article).values_list('related_id', flat=True))
+
+        # The neighbour lists the edited article, which in turn has better matches than the neighbour.
+        self.assertIn(edited.pk, related_ids(neighbour))
+        self.assertEqual(related_ids(edited), {a.pk for a in closer})
+        self.assertEqual(len(related_ids(neighbour)), 2)
+        for title in ('एक', 'दुई'):
+            edited.title = title
+            edited.save()
+        self.assertEqual(len(related_ids(neighbour)), 2)
+        self.assertIn(edited.pk, related_ids(neighbour))
+
+        edited.delete()
+        self.assertEqual(related_ids(neighbour), {a.pk for a in closer})
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.engine = TrendingEngine()
+        category = Category.objects.create(name='मनोरञ्जन', nameEnglish='Entertainment')
+        writer = Writer.objects.create(name='लेखक', email='trend@example.com', role='Reporter', department='News')
+        self.articles = [
+            Article.objects.create(title=f'लेख {i}', excerpt='सार', content='सामग्री', category=category,
+                                   author=writer, status='published')
+            for i in range(3)
+        ]
+
+    def test_recent_views_outrank_older_views_and_flags_pin(self):
+        now = 1_000_000.0
+        old, recent, pinned = self.articles
+        for _ in range(10):
+            self.engine.record_view(old.pk, now=now - 5 * 3600)
+        for _ in range(4):
+            self.engine.record_view(recent.pk, now=now - 60)
+        Article.objects.filter(pk=pinned.pk).update(isHot=True)
+
+        lists = self.engine.compute(now=now)
+        self.assertEqual(lists['trending'], [old.pk, recent.pk])
+        self.assertEqual(lists['hot'], [pinned.pk, recent.pk])
+        old.refresh_from_db()
+        self.assertEqual(old.views, 10)
+
+    def test_views_are_flushed_and_pruned_without_polling(self):
+        now = 1_000_000.0
+        article = self.articles[0]
+        self.engine.record_view(article.pk, now=now)
+        for _ in range(3):
+            self.engine.record_view(article.pk, now=now + 1)
+        # Rolling over to a bucket past the window drops the old ones and writes the pending views.
+        self.engine.record_view(article.pk, now=now + 2 * 24 * 3600)
+        article.refresh_from_db()
+        self.assertEqual(article.views, 5)
+        self.assertEqual(len(self.engine._buckets), 1)
+
+        with patch('accounts.trending.FLUSH_VIEWS', 2):
+            self.engine.record_view(self.articles[1].pk, now=now + 2 * 24 * 3600)
+            self.engine.record_view(self.articles[2].pk, now=now + 2 * 24 * 3600)
+        views = Article.objects.filter(pk__in=[a.pk for a in self.articles]).order_by('pk').values_list('views', flat=True)
+        self.assertEqual(list(views), [5, 1, 1])
+
+    @patch('accounts.views.trending_engine', new_callable=TrendingEngine)
+    def test_view_beacon_feeds_the_endpoint(self, engine):
+        client = APIClient()
+        self.assertEqual(client.post(f'/api/articles/{self.articles[1].pk}/view/').status_code, 204)
+        self.assertEqual(client.post('/api/articles/9999/view/').status_code, 404)
+        response = client.get('/api/articles/trending/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.articles[1].pk, [a['id'] for a in response.data['trending']])
+
+
+class TaxonomyTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='अर्थ', nameEnglish='Economy', subcategories=['बजार', 'बैंक'])
+        self.writer = Writer.objects.create(name='लेखक', email='tax@example.com', role='Reporter', department='News')
+
+    def make(self, tags, subcategory=''):
+        return Article.objects.create(
+            title='लेख', excerpt='सार', content='सामग्री', category=self.category, author=self.writer,
+            status='published', tags=tags, subcategory=subcategory,
+        )
+
+    def test_subcategories_and_tags_are_mirrored_with_counts(self):
+        first = self.make(['सेयर', 'ब्याज'], subcategory='बजार')
+        self.make(['सेयर'], subcategory='बजार')
+        client = APIClient()
+
+        response = client.get('/api/tags/')
+        self.assertEqual(response.data['results'][0], {'name': 'सेयर', 'articlesCount': 2})
+        response = client.get('/api/tags/ब्याज/articles/')
+        self.assertEqual([a['id'] for a in response.data['results']], [first.pk])
+
+        first.tags = ['ब्याज']
+        first.save()
+        self.assertEqual(Tag.objects.get(name='सेयर').articlesCount, 1)
+        first.delete()
+        self.assertEqual(Tag.objects.get(name='ब्याज').articlesCount, 0)
+
+        response = client.get(f'/api/categories/{self.category.pk}/subcategories/')
+        self.assertEqual(response.data, [{'name': 'बजार', 'articlesCount': 1}, {'name': 'बैंक', 'articlesCount': 0}])
+
+        self.category.subcategories = ['बैंक']
+        self.category.save()
+        self.assertEqual(list(Subcategory.objects.filter(category=self.category).values_list('name', flat=True)), ['बैंक'])
+        response = client.get(f'/api/categories/{self.category.pk}/subcategories/बजार/articles/')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_tag_counts_follow_publication(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user('tagger', 'tagger@example.com', 'pass'))
+        article = self.make(['गोप्य'])
+        article.status = 'draft'
+        article.save()
+        Article.objects.create(title='तालिका', content='सामग्री', category=self.category, author=self.writer,
+                               status='scheduled', tags=['गोप्य'])
+        self.assertEqual(Tag.objects.get(name='गोप्य').articlesCount, 0)
+        self.assertEqual(client.get('/api/tags/').data['count'], 0)
+
+        client.post('/api/articles/bulk-update/', {'ids': [article.pk], 'changes': {'status': 'published'}}, format='json')
+        self.assertEqual(client.get('/api/tags/').data['results'], [{'name': 'गोप्य', 'articlesCount': 1}])
+        client.post('/api/articles/bulk-update/', {'ids': [article.pk], 'changes': {'status': 'draft'}}, format='json')
+        self.assertEqual(Tag.objects.get(name='गोप्य').articlesCount, 0)
+        article.delete()
+        self.assertEqual(Tag.objects.get(name='गोप्य').articlesCount, 0)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='प्रविधि', nameEnglish='Technology')
+        writer = Writer.objects.create(name='लेखक', email='gzip@example.com', role='Reporter', department='News')
+        for i in range(20):
+            Article.objects.create(title=f'प्रविधि समाचार {i}', excerpt='सार ' * 50, content='<p>सामग्री</p>' * 100,
+                                   category=category, author=writer, status='published')
+        self.category = category
+
+    def test_negotiation_prefers_supported_encodings(self):
+        self.assertEqual(compression.negotiate('gzip;q=0.5, identity'), 'gzip')
+        self.assertIsNone(compression.negotiate('gzip;q=0, identity'))
+        self.assertIsNone(compression.negotiate(''))
+
+    def test_responses_are_compressed_above_threshold(self):
+        client = APIClient()
+        response = client.get('/api/articles/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(len(data), 20)
+
+        response = client.get('/api/tags/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cached_feed_reuses_compressed_variant(self):
+        client = APIClient()
+        url = f'/api/feeds/categories/{self.category.pk}/rss/'
+        first = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        with patch('accounts.compression.compress') as compress:
+            second = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertIn('प्रविधि समाचार', gzip.decompress(second.content).decode())
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'login': '2/min', 'login_username': '3/min', 'anon': '3/min'},
+})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_login_budget_sets_retry_after(self):
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(client.post('/api/login/', {'username': 'x', 'password': 'y'}).status_code, 400)
+        response = client.post('/api/login/', {'username': 'x', 'password': 'y'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertIn('scope="login"', registry.render_prometheus())
+
+    def test_budgets_are_per_client_ip(self):
+        client = APIClient()
+        for _ in range(3):
+            client.get('/api/tags/', REMOTE_ADDR='10.0.0.1')
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get('/api/tags/', REMOTE_ADDR='10.0.0.1').status_code, 429)
+        self.assertEqual(client.get('/api/tags/', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_forwarded_for_does_not_reset_the_budget(self):
+        client = APIClient()
+        statuses = [
+            client.post('/api/login/', {'username': f'x{i}', 'password': 'y'}, HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [400, 400, 429])
+
+    def test_login_budget_per_username_spans_addresses(self):
+        client = APIClient()
+        statuses = [
+            client.post('/api/login/', {'username': 'Editor', 'password': 'y'}, REMOTE_ADDR=f'10.0.1.{i}').status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses, [400, 400, 400, 429])
+        self.assertIn('scope="login_username"', registry.render_prometheus())
+
+    def test_only_failed_logins_use_the_username_budget(self):
+        CustomUser.objects.create_user('editor', 'editor@example.com', 'secret')
+        client = APIClient()
+
+        def attempt(i, password):
+            return client.post('/api/login/', {'username': 'editor', 'password': password},
+                               REMOTE_ADDR=f'10.0.2.{i}').status_code
+
+        self.assertEqual([attempt(i, 'secret') for i in range(4)], [200] * 4)
+        # Signing in clears earlier failures; three in a row then lock the name.
+        passwords = ['wrong', 'wrong', 'secret', 'wrong', 'wrong', 'wrong', 'secret']
+        self.assertEqual([attempt(i, password) for i, password in enumerate(passwords, start=4)],
+                         [400, 400, 200, 400, 400, 400, 429])
+
+
+class RevisionTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='साहित्य', nameEnglish='Literature')
+        self.writer = Writer.objects.create(name='लेखक', email='rev@example.com', role='Reporter', department='News')
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('reviser', 'reviser@example.com', 'pass'))
+
+    def test_edits_are_stored_as_diffs_and_can_be_restored(self):
+        body = ''.join(f'<p>अनुच्छेद {i} ' + 'शब्द ' * 40 + '</p>' for i in range(30))
+        payload = {
+            'title': 'मूल', 'excerpt': 'सार', 'content': body,
+            'category': self.category.pk, 'author': self.writer.pk,
+            'publishDate': '2025-08-21', 'publishTime': '10:00',
+        }
+        pk = self.client.post('/api/articles/', payload, format='json').data['id']
+        versions = [body]
+        with patch('accounts.revisions.SNAPSHOT_INTERVAL', 5):
+            for i in range(7):
+                versions.append(versions[-1].replace(f'अनुच्छेद {i} ', f'सम्पादित {i} '))
+                payload.update(content=versions[-1], title=f'संस्करण {i}')
+                self.client.put(f'/api/articles/{pk}/', payload, format='json')
+
+        history = ArticleRevision.objects.filter(article_id=pk).order_by('number')
+        self.assertEqual([r.is_snapshot for r in history], [True, False, False, False, False, True, False, False])
+        self.assertLess(len(history[2].content_data), len(body.encode()) / 20)
+        for number, body in enumerate(versions, start=1):
+            self.assertEqual(revisions.rebuild_content(pk, number), body)
+
+        listing = self.client.get(f'/api/articles/{pk}/revisions/').data
+        self.assertEqual((listing[0]['number'], listing[0]['title']), (8, 'संस्करण 6'))
+        self.assertEqual(self.client.get(f'/api/articles/{pk}/revisions/99/').status_code, 404)
+
+        response = self.client.post(f'/api/articles/{pk}/revisions/3/restore/')
+        self.assertEqual(response.data['content'], versions[2])
+        self.assertEqual(Article.objects.get(pk=pk).title, 'संस्करण 1')
+        self.assertEqual(ArticleRevision.objects.filter(article_id=pk).count(), 9)
+
+    def test_tokenizing_is_lossless(self):
+        for text in ['price 5 <10 dollars', 'a < b > c', '<p>x <', '<<b>>', '']:
+            self.assertEqual(''.join(revisions.tokenize(text)), text)
+
+    def test_restore_content_with_bare_angle_bracket(self):
+        payload = {
+            'title': 'मूल', 'excerpt': 'सार', 'content': '<p>price 5 <10 dollars</p>',
+            'category': self.category.pk, 'author': self.writer.pk,
+            'publishDate': '2025-08-21', 'publishTime': '10:00',
+        }
+        pk = self.client.post('/api/articles/', payload, format='json').data['id']
+        payload['content'] = '<p>price 7 <10 dollars, a < b</p>'
+        self.client.put(f'/api/articles/{pk}/', payload, format='json')
+        payload['content'] = '<p>new</p>'
+        self.client.put(f'/api/articles/{pk}/', payload, format='json')
+
+        self.assertEqual(revisions.rebuild_content(pk, 2), '<p>price 7 <10 dollars, a < b</p>')
+        response = self.client.post(f'/api/articles/{pk}/revisions/2/restore/')
+        self.assertEqual(response.data['content'], '<p>price 7 <10 dollars, a < b</p>')
+
+
+class ContentProcessingTests(TestCase):
+    def test_sanitizes_and_extracts_text(self):
+        processed = content.process(
+            '<p onclick="x()">नेपाल<script>alert(1)</script> <a href="javascript:alert(1)">लिंक</a>'
+            '<img src="https://cdn.example.com/a.jpg"><iframe src="https://evil.example.com/"></iframe>'
+            '<iframe src="https://www.youtube.com/embed/abc"></iframe><b>खुला'
+        )
+        self.assertEqual(
+            processed.html,
+            '<p>नेपाल <a rel="noopener nofollow">लिंक</a><img src="https://cdn.example.com/a.jpg">'
+            '<iframe src="https://www.youtube.com/embed/abc"></iframe><b>खुला</b></p>'
+        )
+        self.assertEqual(processed.text, 'नेपाल लिंक\nखुला')
+        self.assertEqual(processed.first_image, 'https://cdn.example.com/a.jpg')
+
+    def test_counts_devanagari_words(self):
+        self.assertEqual(content.count_words('प्रधानमन्त्रीले संसदमा सम्बोधन गर्नुभयो। Budget 2082/83'), (4, 3))
+        self.assertEqual(content.read_time(300, 0), 2)
+        self.assertEqual(content.read_time(0, 0), 0)
+
+    def test_save_fills_derived_fields(self):
+        category = Category.objects.create(name='अर्थ', nameEnglish='Economy')
+        writer = Writer.objects.create(name='लेखक', email='content@example.com', role='Reporter', department='News')
+        body = '<p>' + 'बजेट ' * 400 + '</p><img src="https://cdn.example.com/b.jpg">'
+        article = Article.objects.create(title='बजेट', content=body, category=category, author=writer)
+        self.assertEqual(article.readTime, 3)
+        self.assertTrue(article.excerpt.startswith('बजेट बजेट') and article.excerpt.endswith('…'))
+        self.assertEqual(article.featuredImage, 'https://cdn.example.com/b.jpg')
+        self.assertNotIn('<script', article.contentHtml)
+
+        article.excerpt = 'सम्पादकको सार'
+        article.content = '<p>छोटो</p>'
+        article.save()
+        article.refresh_from_db()
+        self.assertEqual((article.readTime, article.excerpt, article.contentHtml), (1, 'सम्पादकको सार', '<p>छोटो</p>'))
+
+    @override_settings(SITE_URL='https://ktmpost.example')
+    def test_featured_image_from_upload_is_absolute(self):
+        category = Category.objects.create(name='अर्थ', nameEnglish='Economy')
+        writer = Writer.objects.create(name='लेखक', email='image@example.com', role='Reporter', department='News')
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user('imager', 'imager@example.com', 'pass'))
+        payload = {
+            'title': 'तस्बिर', 'excerpt': 'सार', 'content': '<p>पाठ</p><img src="/media/uploads/a.png">',
+            'category': category.pk, 'author': writer.pk, 'publishDate': '2025-08-21', 'publishTime': '10:00',
+        }
+        response = client.post('/api/articles/', payload, format='json')
+        self.assertEqual(response.data['featuredImage'], 'https://ktmpost.example/media/uploads/a.png')
+        # The derived value must survive the editor sending the article back.
+        payload['featuredImage'] = response.data['featuredImage']
+        response = client.put(f"/api/articles/{response.data['id']}/", payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content.absolute_image_url('mailto:x@example.com', 'https://ktmpost.example'), '')
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category_tree.tree.clear()
+        self.category = Category.objects.create(name='खेल', nameEnglish='Sports', subcategories=['फुटबल', 'क्रिकेट'], order=2)
+        Category.objects.create(name='पुरानो', nameEnglish='Old', isActive=False, order=1)
+        self.writer = Writer.objects.create(name='लेखक', email='tree@example.com', role='Reporter', department='News')
+        self.article = Article.objects.create(
+            title='खेल समाचार', content='<p>गोल</p>', category=self.category, subcategory='फुटबल',
+            author=self.writer, status='published',
+        )
+
+    def test_tree_is_memoized_and_revalidated(self):
+        client = APIClient()
+        response = client.get('/api/categories/tree/')
+        tree = json.loads(response.content)
+        self.assertEqual([c['nameEnglish'] for c in tree], ['Sports'])
+        self.assertEqual(tree[0]['articlesCount'], 1)
+        self.assertEqual(tree[0]['subcategories'], [
+            {'name': 'फुटबल', 'articlesCount': 1}, {'name': 'क्रिकेट', 'articlesCount': 0},
+        ])
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get('/api/categories/tree/').content, response.content)
+            self.assertEqual(client.get('/api/categories/tree/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_publishing_changes_invalidate_the_tree(self):
+        client = APIClient()
+        etag = client.get('/api/categories/tree/')['ETag']
+        self.article.views = 10
+        self.article.save()
+        self.assertEqual(client.get('/api/categories/tree/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.article.status = 'draft'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.article.save()
+            # The tree version only moves once the transaction commits.
+            self.assertEqual(client.get('/api/categories/tree/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertTrue(callbacks)
+        response = client.get('/api/categories/tree/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)[0]['articlesCount'], 0)
+
+        self.category.name = 'खेलकुद'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        self.assertEqual(json.loads(client.get('/api/categories/tree/').content)[0]['name'], 'खेलकुद')
+
+
+class BulkEditorialTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category_tree.tree.clear()
+        self.categories = [Category.objects.create(name=f'विधा {i}', nameEnglish=f'Section {i}', order=i) for i in range(3)]
+        writer = Writer.objects.create(name='लेखक', email='bulkedit@example.com', role='Reporter', department='News')
+        self.articles = [
+            Article.objects.create(title=f'लेख {i}', content='<p>सामग्री</p>', category=self.categories[0],
+                                   author=writer, status='published', tags=['चुनाव'])
+            for i in range(6)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('bulkeditor', 'bulkeditor@example.com', 'pass'))
+
+    def test_reorder_categories(self):
+        ids = [c.pk for c in reversed(self.categories)]
+
+        def sitemap_order():
+            body = self.client.get('/api/sitemap-categories.xml').content.decode()
+            return sorted(ids, key=lambda pk: body.index(f'/category/{pk}<'))
+
+        self.assertEqual(sitemap_order(), ids[::-1])
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(2):
+            response = self.client.post('/api/categories/reorder/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Category.objects.order_by('order').values_list('pk', flat=True)), ids)
+        self.assertEqual(sitemap_order(), ids)
+        self.assertEqual(self.client.post('/api/categories/reorder/', {'ids': [ids[0], 9999]}, format='json').status_code, 400)
+
+    def test_bulk_flags_and_unpublish(self):
+        ids = [a.pk for a in self.articles[:4]]
+        response = self.client.post('/api/articles/bulk-update/', {'ids': ids, 'changes': {'isHot': True}}, format='json')
+        self.assertEqual(response.data, {'updated': 4})
+        self.assertEqual(set(Article.objects.filter(isHot=True).values_list('pk', flat=True)), set(ids))
+
+        tree_etag = APIClient().get('/api/categories/tree/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/articles/bulk-update/', {'ids': ids, 'changes': {'status': 'draft'}}, format='json')
+        self.assertEqual(Article.objects.filter(status='published').count(), 2)
+        self.assertFalse(RelatedArticle.objects.filter(related_id__in=ids).exists())
+        self.assertNotEqual(APIClient().get('/api/categories/tree/')['ETag'], tree_etag)
+
+        self.client.post('/api/articles/bulk-update/', {'ids': ids, 'changes': {'status': 'published'}}, format='json')
+        self.assertTrue(RelatedArticle.objects.filter(article_id=ids[0]).exists())
+
+        for changes in [{'title': 'x'}, {'status': 'gone'}, {}]:
+            response = self.client.post('/api/articles/bulk-update/', {'ids': ids, 'changes': changes}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+
+@override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+class UploadLimitTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('uploader', 'uploader@example.com', 'pass'))
+        storage = patch('accounts.views.FileSystemStorage')
+        self.storage = storage.start()
+        self.storage.return_value.save.side_effect = lambda name, file: name
+        self.addCleanup(storage.stop)
+
+    def upload(self, url, name, data):
+        return self.client.post(url, {'file': SimpleUploadedFile(name, data, content_type='video/mp4')}, format='multipart')
+
+    def test_recognised_files_are_saved(self):
+        response = self.upload('/api/upload/', 'photo.png', b'\x89PNG\r\n\x1a\n' + b'\0' * 4096)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['url'], '/media/uploads/photo.png')
+        response = self.upload('/api/upload/video/', 'clip.mp4', b'\0\0\0\x18ftypmp42' + b'\0' * 4096)
+        self.assertEqual(response.status_code, 200)
+
+    def test_wrong_magic_bytes_never_reach_disk(self):
+        with patch('django.core.files.uploadhandler.TemporaryFileUploadHandler.receive_data_chunk') as spool:
+            response = self.upload('/api/upload/video/', 'clip.mp4', b'<html>not a video</html>' * 1000)
+        self.assertEqual(response.status_code, 415)
+        spool.assert_not_called()
+        self.storage.return_value.save.assert_not_called()
+
+    def test_oversized_bodies_are_refused_before_reading(self):
+        with patch.object(UploadView, 'max_upload_size', 1024):
+            with patch('accounts.uploads.LimitedUploadHandler.receive_data_chunk') as receive:
+                response = self.upload('/api/upload/', 'big.png', b'\x89PNG\r\n\x1a\n' + b'\0' * 200 * 1024)
+            self.assertEqual(response.status_code, 413)
+            receive.assert_not_called()
+
+            # Within the Content-Length allowance, the running size check stops the stream.
+            response = self.upload('/api/upload/', 'big.png', b'\x89PNG\r\n\x1a\n' + b'\0' * 8 * 1024)
+            self.assertEqual(response.status_code, 413)
+        self.storage.return_value.save.assert_not_called()
+
+
+class WriterProfileTests(TestCase):
+    def setUp(self):
+        self.politics = Category.objects.create(name='राजनीति', nameEnglish='Politics')
+        self.sports = Category.objects.create(name='खेल', nameEnglish='Sports')
+        self.writer = Writer.objects.create(name='लेखक', email='profile@example.com', role='Reporter', department='News')
+        self.other = Writer.objects.create(name='अर्को', email='other@example.com', role='Reporter', department='News')
+
+    def article(self, **kwargs):
+        values = dict(title='लेख', content='<p>सामग्री</p>', category=self.politics, author=self.writer,
+                      status='published', publishDate=date(2025, 8, 1), publishTime=time(9, 0))
+        values.update(kwargs)
+        return Article.objects.create(**values)
+
+    def stats(self, writer=None):
+        return APIClient().get(f'/api/writers/{(writer or self.writer).pk}/profile/').data['stats']
+
+    def test_aggregates_follow_article_writes(self):
+        first = self.article(views=10)
+        latest = self.article(category=self.sports, views=5, publishDate=date(2025, 8, 3))
+        self.article(status='draft', views=1)
+        stats = self.stats()
+        self.assertEqual(stats['articles'], {'published': 2, 'draft': 1, 'scheduled': 0})
+        self.assertEqual((stats['totalViews'], stats['lastPublishDate']), (16, date(2025, 8, 3)))
+
+        latest.status = 'draft'
+        latest.save()
+        first.category = self.sports
+        first.save()
+        stats = self.stats()
+        self.assertEqual(stats['articles'], {'published': 1, 'draft': 2, 'scheduled': 0})
+        self.assertEqual(stats['lastPublishDate'], date(2025, 8, 1))
+        self.assertEqual(stats['topCategories'], [{'id': self.sports.pk, 'name': 'खेल', 'articlesCount': 1}])
+
+        first.author = self.other
+        first.save()
+        self.assertEqual((self.stats()['articles']['published'], self.stats(self.other)['totalViews']), (0, 10))
+        first.delete()
+        self.assertEqual(self.stats(self.other)['articles']['published'], 0)
+
+        engine = TrendingEngine()
+        engine.record_view(latest.pk)
+        engine.flush_views()
+        incremental = self.stats()
+        authors.rebuild()
+        self.assertEqual(self.stats(), incremental)
+        self.assertEqual(incremental['totalViews'], 7)
+
+    def test_author_articles_are_paginated(self):
+        for day in range(1, 6):
+            self.article(title=f'लेख {day}', publishDate=date(2025, 8, day))
+        self.article(title='मस्यौदा', status='draft')
+        response = APIClient().get(f'/api/writers/{self.writer.pk}/articles/?limit=2')
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual([a['title'] for a in response.data['results']], ['लेख 5', 'लेख 4'])
+        self.assertNotIn('email', APIClient().get(f'/api/writers/{self.writer.pk}/profile/').data)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.news = Category.objects.create(name='समाचार', nameEnglish='News')
+        self.sports = Category.objects.create(name='खेल', nameEnglish='Sports')
+        self.writer = Writer.objects.create(name='लेखक', email='archive@example.com', role='Reporter', department='News')
+
+    def article(self, day, hour, category=None, status='published'):
+        return Article.objects.create(
+            title=f'{day} {hour}', content='<p>सामग्री</p>', category=category or self.news, author=self.writer,
+            status=status, publishDate=date(2025, 8, day), publishTime=time(hour, 0),
+        )
+
+    def test_calendar_counts_follow_publishing(self):
+        first = self.article(28, 9)
+        self.article(28, 10, category=self.sports)
+        self.article(29, 9)
+        self.article(29, 11, status='draft')
+        self.article(1, 9).delete()
+        client = APIClient()
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get('/api/archive/').data, [{'year': 2025, 'articlesCount': 3}])
+        self.assertEqual(client.get('/api/archive/2025/').data, [{'month': 8, 'articlesCount': 3}])
+        self.assertEqual(client.get('/api/archive/2025/8/').data, [
+            {'date': date(2025, 8, 28), 'articlesCount': 2}, {'date': date(2025, 8, 29), 'articlesCount': 1},
+        ])
+
+        first.status = 'draft'
+        first.save()
+        days = client.get(f'/api/archive/2025/8/?category={self.news.pk}').data
+        self.assertEqual(days, [{'date': date(2025, 8, 29), 'articlesCount': 1}])
+        self.assertEqual(client.get('/api/archive/2025/13/').status_code, 404)
+
+        incremental = client.get('/api/archive/2025/8/').data
+        archive.rebuild()
+        self.assertEqual(client.get('/api/archive/2025/8/').data, incremental)
+
+    def test_day_listing_uses_keyset_pages(self):
+        for hour in range(6, 11):
+            self.article(28, hour)
+        self.article(27, 23)
+        client = APIClient()
+        page = client.get('/api/archive/2025/8/28/articles/?limit=2').data
+        titles = [a['title'] for a in page['results']]
+        while page['next']:
+            page = client.get(page['next']).data
+            titles += [a['title'] for a in page['results']]
+        self.assertEqual(titles, [f'28 {hour}' for hour in range(10, 5, -1)])
+        self.assertEqual(client.get('/api/archive/2025/2/30/articles/').status_code, 404)
+
+        with CaptureQueriesContext(connection) as ctx:
+            client.get('/api/archive/2025/8/28/articles/')
+        self.assertEqual(full_table_scans(ctx.captured_queries[-1]['sql']), [])
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='समाचार', nameEnglish='News')
+        self.writer = Writer.objects.create(name='लेखक', email='snapshot@example.com', role='Reporter', department='News')
+        self.articles = [
+            Article.objects.create(
+                title=f'खबर {n}', content='<p>सामग्री</p>', category=self.category, author=self.writer,
+                status='published', publishDate=date(2025, 8, 28), publishTime=time(n, 0),
+            )
+            for n in range(3)
+        ]
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def read(self, path):
+        with open(os.path.join(self.root, path), 'rb') as fh:
+            return fh.read()
+
+    def test_export_is_incremental(self):
+        self.assertEqual(snapshot.export(self.root, workers=1)['articles'], 3)
+        first = self.articles[0]
+        body = self.read(snapshot.article_path(first.pk))
+        api = APIClient().get(f'/api/articles/{first.pk}/').json()
+        del api['views']
+        self.assertEqual(json.loads(body), api)
+        self.assertEqual(gzip.decompress(self.read(snapshot.article_path(first.pk) + '.gz')), body)
+        home = json.loads(self.read('home/index.json'))
+        self.assertEqual([a['title'] for a in home['latest']], ['खबर 2', 'खबर 1', 'खबर 0'])
+        self.assertIn(b'<rss', self.read(f'feeds/categories/{self.category.pk}/rss/index.xml'))
+
+        self.assertEqual(snapshot.export(self.root, workers=1), {'articles': 0, 'removed': 0, 'written': 0})
+
+        first.title = 'नयाँ शीर्षक'
+        first.save()
+        self.articles[1].status = 'draft'
+        self.articles[1].save()
+        summary = snapshot.export(self.root, workers=1)
+        self.assertEqual((summary['articles'], summary['removed']), (1, 1))
+        self.assertEqual(json.loads(self.read(snapshot.article_path(first.pk)))['title'], 'नयाँ शीर्षक')
+        self.assertFalse(os.path.exists(os.path.join(self.root, snapshot.article_path(self.articles[1].pk))))
+
+        # Article pages embed the category name, so renaming it re-renders them all.
+        self.category.name = 'खबर'
+        self.category.save()
+        self.assertEqual(snapshot.export(self.root, workers=1)['articles'], 2)
+
+    def test_pages_missing_from_a_run_are_removed(self):
+        sports = Category.objects.create(name='खेल', nameEnglish='Sports')
+        with patch('accounts.feeds.SITEMAP_PAGE_SIZE', 1):
+            snapshot.export(self.root, workers=1)
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'sitemap-articles-3.xml.gz')))
+        self.assertTrue(os.path.exists(os.path.join(self.root, f'categories/{sports.pk}/latest/index.json')))
+
+        sports.isActive = False
+        with self.captureOnCommitCallbacks(execute=True):
+            sports.save()
+        # View counts alone don't make article pages stale.
+        Article.objects.filter(pk=self.articles[0].pk).update(views=F('views') + 5)
+        summary = snapshot.export(self.root, workers=1)
+        self.assertEqual(summary['articles'], 0)
+        # Two sitemap pages and the category's latest, subcategories, RSS and Atom files.
+        self.assertEqual(summary['removed'], 6)
+        for path in ['sitemap-articles-2.xml', 'sitemap-articles-3.xml.br', f'feeds/categories/{sports.pk}/rss/index.xml']:
+            self.assertFalse(os.path.exists(os.path.join(self.root, path)), path)
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'sitemap-articles-1.xml')))
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'anon': '1/min'}})
+    def test_pages_are_not_throttled_and_errors_abort(self):
+        snapshot.export(self.root, workers=1)
+        self.assertEqual(json.loads(self.read('categories/index.json'))[0]['name'], 'समाचार')
+        self.assertIn(b'<rss', self.read(f'feeds/categories/{self.category.pk}/rss/index.xml'))
+
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with patch('accounts.feeds.news_sitemap', return_value=HttpResponse(status=500)):
+            with self.assertRaises(snapshot.SnapshotError):
+                snapshot.export(root, workers=1)
+        self.assertFalse(os.path.exists(os.path.join(root, 'categories/index.json')))
+
+
+class PurgeStub(BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        PurgeStub.received.append(json.loads(body)['keys'])
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class SurrogateKeyTests(TransactionTestCase):
+    def setUp(self):
+        server = HTTPServer(('127.0.0.1', 0), PurgeStub)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        PurgeStub.received = []
+        purge_settings = override_settings(PURGE_URL=f'http://127.0.0.1:{server.server_port}/purge', PURGE_BATCH_SIZE=3)
+        purge_settings.enable()
+        self.addCleanup(purge_settings.disable)
+
+        self.category = Category.objects.create(name='विश्व', nameEnglish='World')
+        writer = Writer.objects.create(name='लेखक', email='purge@example.com', role='Reporter', department='News')
+        self.articles = [
+            Article.objects.create(title=f'लेख {i}', content='<p>सामग्री</p>', category=self.category,
+                                   author=writer, status='published', publishDate='2025-08-21', publishTime='10:00')
+            for i in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('purger', 'purger@example.com', 'pass'))
+        PurgeStub.received = []
+
+    def test_public_responses_carry_surrogate_keys(self):
+        pk = self.articles[0].pk
+        response = APIClient().get(f'/api/articles/{pk}/')
+        self.assertEqual(response['Surrogate-Key'], f'article:{pk}')
+        self.assertEqual(response['Surrogate-Control'], f'max-age={settings.SURROGATE_SHORT_MAX_AGE}')
+        self.assertEqual(APIClient().get('/api/categories/tree/')['Surrogate-Control'],
+                         f'max-age={settings.SURROGATE_MAX_AGE}')
+        self.assertEqual(APIClient().get(f'/api/feeds/categories/{self.category.pk}/rss/')['Surrogate-Key'],
+                         f'category:{self.category.pk}')
+        self.assertFalse(self.client.get('/api/article-stats/').has_header('Surrogate-Key'))
+
+    def test_changes_send_one_batched_purge_per_request(self):
+        ids = [a.pk for a in self.articles]
+        self.client.post('/api/articles/bulk-update/', {'ids': ids, 'changes': {'isHot': True}}, format='json')
+        expected = sorted(['home', f'category:{self.category.pk}'] + [f'article:{pk}' for pk in ids])
+        self.assertEqual(PurgeStub.received, [expected[:3], expected[3:]])
+
+        PurgeStub.received = []
+        video = Video.objects.create(title='प्रत्यक्ष', uploader=CustomUser.objects.get(username='purger'))
+        PurgeStub.received = []
+        self.assertEqual(self.client.patch(f'/api/videos/{video.pk}/live/', {'is_live': True}, format='json').status_code, 200)
+        self.assertEqual(PurgeStub.received, [['video-live']])
+        self.assertEqual(APIClient().get('/api/videos/live/')['Surrogate-Key'], 'video-live')
+
+        PurgeStub.received = []
+        self.assertEqual(self.client.patch(f'/api/writers/{self.articles[0].author_id}/', {'bio': 'नयाँ'}, format='json').status_code, 200)
+        self.assertEqual(PurgeStub.received, [['home']])
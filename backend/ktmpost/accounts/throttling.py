@@ -0,0 +1,147 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import ParseError
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import registry
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def budget(scope):
+    """(limit, period in seconds) of ``scope``, or None when it has no rate."""
+    rate = settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {}).get(scope)
+    return None if rate is None else parse_rate(rate)
+
+
+def window_key(scope, ident, window):
+    return f'throttle:{scope}:{ident}:{window}'
+
+
+def count_request(scope, ident, period, now):
+    """Add one to ``ident``'s counter for the current window of ``scope``; returns the new count."""
+    key = window_key(scope, ident, int(now // period))
+    cache.add(key, 0, period * 2)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); start the window again.
+        cache.set(key, 1, period * 2)
+        return 1
+
+
+def normalize_username(username):
+    return username.strip().lower() if isinstance(username, str) and username.strip() else None
+
+
+def record_login_failure(username):
+    """Count a failed login against the 'login_username' budget of ``username``."""
+    username = normalize_username(username)
+    limits = budget('login_username')
+    if username is None or limits is None or not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return
+    count_request('login_username', f'username:{username}', limits[1], time.time())
+
+
+def clear_login_failures(username):
+    """Forget the failed logins of ``username`` once it signs in."""
+    username = normalize_username(username)
+    limits = budget('login_username')
+    if username is None or limits is None:
+        return
+    window = int(time.time() // limits[1])
+    cache.delete_many([window_key('login_username', f'username:{username}', w) for w in (window - 1, window)])
+
+
+class RateLimitThrottle(BaseThrottle):
+    """
+    Per-scope request budgets keyed by user id, or by client IP for anonymous
+    requests. Views pick a budget with ``throttle_scope``; otherwise 'user' or
+    'anon' applies. Failed logins are also counted per submitted username
+    under 'login_username', so one account can't be guessed at from many
+    addresses. LoginView records the failures and clears them on success, so
+    signing in with the right password never locks the account.
+    Budgets live in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+
+    Each budget is a sliding window: the current window's counter plus the
+    previous window's counter weighted by how much of it still overlaps. That
+    allows bursts up to the budget and refills continuously like a token
+    bucket. Counters only use cache.add/incr/get, which are atomic on the
+    locmem, Redis and Memcached backends, and the check never touches the database.
+    """
+    def get_ident(self, request):
+        # With NUM_PROXIES unset DRF would trust the client-supplied
+        # X-Forwarded-For, letting anyone pick a fresh budget per request.
+        if settings.REST_FRAMEWORK.get('NUM_PROXIES') is None:
+            return request.META.get('REMOTE_ADDR')
+        return super().get_ident(request)
+
+    def login_username(self, request):
+        try:
+            username = request.data.get('username')
+        except (AttributeError, ParseError):
+            return None
+        return normalize_username(username)
+
+    def allow_request(self, request, view):
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            return True
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            ident = f'user:{user.pk}'
+            default_scope = 'user'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+            default_scope = 'anon'
+        scope = getattr(view, 'throttle_scope', None) or default_scope
+        if not self.check(scope, ident):
+            return False
+        if scope == 'login':
+            username = self.login_username(request)
+            if username is not None:
+                return self.check('login_username', f'username:{username}', count=False)
+        return True
+
+    def check(self, scope, ident, count=True):
+        """
+        Count one request against ``scope``'s budget for ``ident``; False once
+        it's spent. With ``count`` off, only see whether one more would fit.
+        """
+        self.scope = scope
+        limits = budget(scope)
+        if limits is None:
+            return True
+        self.limit, self.period = limits
+
+        now = time.time()
+        window = int(now // self.period)
+        if count:
+            current = count_request(scope, ident, self.period, now)
+        else:
+            current = cache.get(window_key(scope, ident, window), 0) + 1
+        previous = cache.get(window_key(scope, ident, window - 1), 0)
+        self.elapsed = (now % self.period) / self.period
+        self.current, self.previous = current, previous
+
+        allowed = previous * (1 - self.elapsed) + current <= self.limit
+        registry.increment('ktmpost_throttle_requests_total', scope=scope,
+                           outcome='allowed' if allowed else 'throttled')
+        return allowed
+
+    def wait(self):
+        """Seconds until the weighted count drops back under the budget."""
+        remaining_window = (1 - self.elapsed) * self.period
+        if self.current >= self.limit or not self.previous:
+            return math.ceil(remaining_window) or 1
+        # Solve previous * (1 - elapsed') + current <= limit for elapsed'.
+        needed = 1 - (self.limit - self.current) / self.previous
+        return max(1, math.ceil((needed - self.elapsed) * self.period))
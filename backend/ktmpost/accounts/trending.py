@@ -0,0 +1,126 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import authors
+from .models import Article
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 300
+REFRESH_SECONDS = 60
+LIST_SIZE = 20
+# Pending views are written to the database when a bucket rolls over or once this many pile up.
+FLUSH_VIEWS = 1000
+
+# name -> (window in seconds, half-life in seconds, editor override flag)
+LISTS = {
+    'trending': (24 * 3600, 6 * 3600, 'isTrending'),
+    'hot': (3 * 3600, 3600, 'isHot'),
+}
+WINDOW_SECONDS = max(window for window, _, _ in LISTS.values())
+
+
+class TrendingEngine:
+    """
+    Rolling per-article view counts in fixed time buckets, turned into
+    time-decayed trending and hot rankings.
+
+    View events are held in memory by the process that served them. With several
+    worker processes behind a load balancer, each worker ranks a representative
+    sample of the traffic.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = deque()  # (bucket start, Counter of article id -> views)
+        self._pending_views = Counter()
+        self._computed_at = 0.0
+        self._lists = None
+
+    def record_view(self, article_id, now=None):
+        now = time.time() if now is None else now
+        start = int(now // BUCKET_SECONDS) * BUCKET_SECONDS
+        with self._lock:
+            rolled_over = not self._buckets or self._buckets[-1][0] != start
+            if rolled_over:
+                self._prune(now)
+                self._buckets.append((start, Counter()))
+            self._buckets[-1][1][article_id] += 1
+            self._pending_views[article_id] += 1
+            flush = rolled_over or sum(self._pending_views.values()) >= FLUSH_VIEWS
+        if flush:
+            self.flush_views()
+
+    def _prune(self, now):
+        while self._buckets and self._buckets[0][0] < now - WINDOW_SECONDS:
+            self._buckets.popleft()
+
+    def scores(self, now=None):
+        """Decayed scores for every list, computed in one pass over the buckets."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._prune(now)
+            buckets = [(start, dict(counts)) for start, counts in self._buckets]
+
+        totals = {name: Counter() for name in LISTS}
+        for start, counts in buckets:
+            age = now - (start + BUCKET_SECONDS / 2)
+            weights = [
+                (totals[name], math.pow(0.5, age / half_life))
+                for name, (window, half_life, _) in LISTS.items() if age <= window
+            ]
+            for article_id, views in counts.items():
+                for total, weight in weights:
+                    total[article_id] += views * weight
+        return totals
+
+    def flush_views(self):
+        """Add views recorded since the last flush to Article.views and to the writers' totals."""
+        with self._lock:
+            pending, self._pending_views = self._pending_views, Counter()
+        if not pending:
+            return
+        try:
+            with transaction.atomic():
+                Article.objects.filter(pk__in=list(pending)).update(views=F('views') + Case(
+                    *[When(pk=pk, then=Value(views)) for pk, views in pending.items()],
+                    default=Value(0), output_field=IntegerField(),
+                ))
+                authors.add_views(pending)
+        except DatabaseError as e:
+            # Keep the counts for the next flush rather than failing the request that triggered it.
+            with self._lock:
+                self._pending_views.update(pending)
+            logger.error(f"Flushing {len(pending)} article view counts failed: {str(e)}")
+
+    def compute(self, now=None):
+        """Rank published articles for every list; editor flags pin articles to the top."""
+        self.flush_views()
+        totals = self.scores(now)
+        result = {}
+        for name, (_, _, flag) in LISTS.items():
+            pinned = list(
+                Article.objects.filter(status='published', **{flag: True})
+                .order_by('-publishDate', '-publishTime').values_list('pk', flat=True)[:LIST_SIZE]
+            )
+            ranked = [pk for pk, _ in totals[name].most_common(LIST_SIZE * 2) if pk not in pinned]
+            published = set(Article.objects.filter(pk__in=ranked, status='published').values_list('pk', flat=True))
+            result[name] = (pinned + [pk for pk in ranked if pk in published])[:LIST_SIZE]
+        self._lists = result
+        self._computed_at = time.time()
+        return result
+
+    def lists(self):
+        """Ranked article ids per list, recomputed at most every REFRESH_SECONDS."""
+        if self._lists is None or time.time() - self._computed_at > REFRESH_SECONDS:
+            return self.compute()
+        return self._lists
+
+
+engine = TrendingEngine()
@@ -0,0 +1,122 @@
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.template.defaultfilters import filesizeformat
+from django.utils.datastructures import MultiValueDict
+from rest_framework import status
+
+# Bytes of the file needed to recognise every signature below.
+HEAD_BYTES = 12
+# Allowance for multipart boundaries, part headers and small form fields on top of the file itself.
+MULTIPART_OVERHEAD = 64 * 1024
+
+# kind -> [(content type, [(offset, bytes), ...]), ...]; every part of a signature must match.
+SIGNATURES = {
+    'image': [
+        ('image/jpeg', [(0, b'\xff\xd8\xff')]),
+        ('image/png', [(0, b'\x89PNG\r\n\x1a\n')]),
+        ('image/gif', [(0, b'GIF87a')]),
+        ('image/gif', [(0, b'GIF89a')]),
+        ('image/webp', [(0, b'RIFF'), (8, b'WEBP')]),
+        ('image/avif', [(4, b'ftypavif')]),
+    ],
+    'video': [
+        ('video/webm', [(0, b'\x1a\x45\xdf\xa3')]),
+        ('video/x-msvideo', [(0, b'RIFF'), (8, b'AVI ')]),
+        ('video/ogg', [(0, b'OggS')]),
+        ('video/x-flv', [(0, b'FLV')]),
+        ('video/mpeg', [(0, b'\x00\x00\x01\xba')]),
+        # ISO base media: MP4, MOV, 3GP and M4V all carry an ftyp box first.
+        ('video/mp4', [(4, b'ftyp')]),
+    ],
+}
+
+
+def sniff(head, kind):
+    """Content type of a file of ``kind`` starting with ``head``, or None if it isn't one."""
+    for content_type, parts in SIGNATURES[kind]:
+        if all(head[offset:offset + len(magic)] == magic for offset, magic in parts):
+            return content_type
+    return None
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+    First handler in the chain for upload endpoints. Refuses bodies whose
+    Content-Length is already too large without reading them, and checks the
+    magic bytes and running size of each file as it streams in. Data only
+    reaches the memory/temporary-file handlers after the file's first bytes
+    have been recognised, and a violation stops the upload without reading
+    the rest of the request.
+    """
+
+    def __init__(self, request, kind, max_size):
+        super().__init__(request)
+        self.kind = kind
+        self.max_size = max_size
+        self.rejection = None
+        self.content_types = {}
+
+    def reject(self, status_code, detail):
+        self.rejection = (status_code, detail)
+        raise StopUpload(connection_reset=True)
+
+    def too_large(self):
+        return status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, f'File size exceeds {filesizeformat(self.max_size)} limit.'
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            self.rejection = self.too_large()
+            # Report the body as parsed (and empty) so it is never read.
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.head = b''
+        self.checked = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            self.reject(*self.too_large())
+        if self.checked:
+            return raw_data
+        # Hold data back from the next handlers until the signature is known.
+        self.head += raw_data
+        if len(self.head) < HEAD_BYTES:
+            return None
+        self.check_head()
+        data, self.head = self.head, b''
+        return data
+
+    def check_head(self):
+        content_type = sniff(self.head, self.kind)
+        if content_type is None:
+            self.reject(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, f'Only {self.kind} files are allowed.')
+        self.content_types[self.field_name] = content_type
+        self.checked = True
+
+    def file_complete(self, file_size):
+        if not self.checked:
+            # Shorter than any signature we accept.
+            self.rejection = (status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, f'Only {self.kind} files are allowed.')
+        return None
+
+
+class LimitedUploadMixin:
+    """Installs LimitedUploadHandler with the view's ``upload_kind`` and ``max_upload_size``."""
+    upload_kind = None
+    max_upload_size = None
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers.insert(0, LimitedUploadHandler(request, self.upload_kind, self.max_upload_size))
+        return super().initialize_request(request, *args, **kwargs)
+
+    def upload_rejection(self, request):
+        """(status code, detail) if the upload handler refused the request body, else None."""
+        handler = request.upload_handlers[0]
+        # Touching FILES parses the body, which runs the handler.
+        request.FILES
+        return handler.rejection
+
+    def uploaded_content_type(self, request, field_name):
+        return request.upload_handlers[0].content_types.get(field_name)
@@ -1,8 +1,11 @@
 from django.urls import path
+from . import feeds
 from .views import (
-    CheckAuthView, LoginView, LogoutView, WriterListCreateView, WriterDetailView,
-    CategoryListCreateView, CategoryDetailView, ArticleListCreateView, ArticleDetailView,
-    ArticleStatsView, UploadView, VideoCategoryListCreateView, VideoListCreateView, VideoDetailView, VideoLiveView, VideoUploadView  
+    CheckAuthView, LoginView, LogoutView, WriterListCreateView, WriterDetailView, WriterProfileView, WriterArticlesView,
+    CategoryListCreateView, CategoryTreeView, CategoryReorderView, CategoryDetailView, ArticleListCreateView, ArticleDetailView,
+    ArticleStatsView, ArticleRelatedView, ArticleViewBeaconView, ArticleTrendingView, ArticleBulkImportView, ArticleBulkUpdateView, ArticleExportView, UploadView, VideoCategoryListCreateView, VideoListCreateView, LiveVideoListView, VideoDetailView, VideoLiveView, VideoUploadView,
+    ArticleRevisionListView, ArticleRevisionDetailView, ArticleRevisionRestoreView,
+    ArchiveCalendarView, ArchiveDayArticlesView, TagListView, TagArticlesView, SubcategoryListView, SubcategoryArticlesView, MetricsView,
 
 )
 
@@ -12,16 +15,45 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('writers/', WriterListCreateView.as_view(), name='writer-list-create'),
     path('writers/<int:pk>/', WriterDetailView.as_view(), name='writer-detail'),
+    path('writers/<int:pk>/profile/', WriterProfileView.as_view(), name='writer-profile'),
+    path('writers/<int:pk>/articles/', WriterArticlesView.as_view(), name='writer-articles'),
     path('categories/', CategoryListCreateView.as_view(), name='category-list-create'),
+    path('categories/reorder/', CategoryReorderView.as_view(), name='category-reorder'),
+    path('categories/tree/', CategoryTreeView.as_view(), name='category-tree'),
     path('categories/<int:pk>/', CategoryDetailView.as_view(), name='category-detail'),
+    path('categories/<int:pk>/subcategories/', SubcategoryListView.as_view(), name='subcategory-list'),
+    path('categories/<int:pk>/subcategories/<str:name>/articles/', SubcategoryArticlesView.as_view(), name='subcategory-articles'),
+    path('archive/', ArchiveCalendarView.as_view(), name='archive-years'),
+    path('archive/<int:year>/', ArchiveCalendarView.as_view(), name='archive-months'),
+    path('archive/<int:year>/<int:month>/', ArchiveCalendarView.as_view(), name='archive-days'),
+    path('archive/<int:year>/<int:month>/<int:day>/articles/', ArchiveDayArticlesView.as_view(), name='archive-day-articles'),
+    path('tags/', TagListView.as_view(), name='tag-list'),
+    path('tags/<str:name>/articles/', TagArticlesView.as_view(), name='tag-articles'),
     path('articles/', ArticleListCreateView.as_view(), name='article-list-create'),
     path('articles/<int:pk>/', ArticleDetailView.as_view(), name='article-detail'),
+    path('articles/<int:pk>/revisions/', ArticleRevisionListView.as_view(), name='article-revision-list'),
+    path('articles/<int:pk>/revisions/<int:number>/', ArticleRevisionDetailView.as_view(), name='article-revision-detail'),
+    path('articles/<int:pk>/revisions/<int:number>/restore/', ArticleRevisionRestoreView.as_view(), name='article-revision-restore'),
+    path('articles/<int:pk>/related/', ArticleRelatedView.as_view(), name='article-related'),
+    path('articles/<int:pk>/view/', ArticleViewBeaconView.as_view(), name='article-view'),
+    path('articles/trending/', ArticleTrendingView.as_view(), name='article-trending'),
+    path('articles/bulk/', ArticleBulkImportView.as_view(), name='article-bulk-import'),
+    path('articles/bulk-update/', ArticleBulkUpdateView.as_view(), name='article-bulk-update'),
+    path('articles/export/', ArticleExportView.as_view(), name='article-export'),
     path('article-stats/', ArticleStatsView.as_view(), name='article-stats'),
     path('upload/', UploadView.as_view(), name='upload'),
     path('video-categories/', VideoCategoryListCreateView.as_view(), name='video-category-list-create'),
     path('videos/', VideoListCreateView.as_view(), name='video-list-create'),
+    path('videos/live/', LiveVideoListView.as_view(), name='live-video-list'),
     path('videos/<int:pk>/', VideoDetailView.as_view(), name='video-detail'),
     path('videos/<int:pk>/live/', VideoLiveView.as_view(), name='video-live'),
     path('upload/video/', VideoUploadView.as_view(), name='video-upload'),
+    path('feeds/categories/<int:pk>/rss/', feeds.category_feed, {'kind': 'rss'}, name='category-rss'),
+    path('feeds/categories/<int:pk>/atom/', feeds.category_feed, {'kind': 'atom'}, name='category-atom'),
+    path('sitemap.xml', feeds.sitemap_index, name='sitemap-index'),
+    path('sitemap-categories.xml', feeds.category_sitemap, name='sitemap-categories'),
+    path('sitemap-articles-<int:page>.xml', feeds.article_sitemap, name='sitemap-articles'),
+    path('news-sitemap.xml', feeds.news_sitemap, name='news-sitemap'),
+    path('_metrics/', MetricsView.as_view(), name='metrics'),
 
 ]
\ No newline at end of file
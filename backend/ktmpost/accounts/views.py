@@ -1,20 +1,34 @@
-from time import timezone
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import serializers
 from rest_framework import status, generics
 from django.contrib.auth import authenticate, login, logout
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import transaction
 from django.db.models import Max
 from .models import Video, VideoCategory
 from .serializers import VideoSerializer, VideoCategorySerializer
 import re
 import logging
 from django.core.files.storage import FileSystemStorage
-from .models import Article, Category, CustomUser, Writer
-from .serializers import ArticleSerializer, CategorySerializer, LoginSerializer, WriterSerializer
+from django.http import HttpResponse, StreamingHttpResponse
+from .metrics import registry
+from . import archive, bulk, category_tree, compression, related, revisions, taxonomy, throttling
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.core.exceptions import ValidationError as DjangoValidationError
+from .trending import engine as trending_engine
+from .streaming import StreamingListMixin
+from .uploads import LimitedUploadMixin
+from .models import Article, ArticleRevision, Category, CustomUser, Tag, Writer
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from datetime import date
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from .serializers import ArticleListSerializer, ArticleSerializer, ArticleSummarySerializer, CategorySerializer, LoginSerializer, TagSerializer, WriterProfileSerializer, WriterSerializer
 
 logger = logging.getLogger(__name__)
 
@@ -35,12 +49,15 @@ class IsAuthenticatedOrReadOnly(BasePermission):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'login'
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
+        username = request.data.get('username') if isinstance(request.data, dict) else None
         if serializer.is_valid():
             user = serializer.validated_data
             login(request, user)
+            throttling.clear_login_failures(username)
             try:
                 refresh = RefreshToken.for_user(user)
                 access_token = str(refresh.access_token)
@@ -58,6 +75,7 @@ class LoginView(APIView):
             except Exception as e:
                 logger.error(f"Error generating token for user {user.username}: {str(e)}")
                 return Response({'error': 'Token generation failed'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        throttling.record_login_failure(username)
         logger.warning(f"Login failed: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -95,7 +113,7 @@ class LogoutView(APIView):
             logger.error(f"Error during logout: {str(e)}")
             return Response({'error': 'Logout failed'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class WriterListCreateView(generics.ListCreateAPIView):
+class WriterListCreateView(StreamingListMixin, generics.ListCreateAPIView):
     queryset = Writer.objects.all()
     serializer_class = WriterSerializer
     permission_classes = [IsAuthenticated]
@@ -110,8 +128,29 @@ class WriterDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
+class ArticleListPagination(LimitOffsetPagination):
+    default_limit = 20
+    max_limit = 100
+
+class WriterProfileView(generics.RetrieveAPIView):
+    queryset = Writer.objects.filter(status='active')
+    serializer_class = WriterProfileSerializer
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+class WriterArticlesView(generics.ListAPIView):
+    serializer_class = ArticleSummarySerializer
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    pagination_class = ArticleListPagination
+
+    def get_queryset(self):
+        writer = get_object_or_404(Writer, pk=self.kwargs['pk'], status='active')
+        return (Article.objects.filter(author=writer, status='published')
+                .select_related('category').order_by('-publishDate', '-publishTime'))
+
 class CategoryListCreateView(generics.ListCreateAPIView):
-    queryset = Category.objects.all()
+    queryset = Category.objects.order_by('order')
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -125,6 +164,38 @@ class CategoryListCreateView(generics.ListCreateAPIView):
         max_order = Category.objects.all().aggregate(Max('order'))['order__max'] or 0
         serializer.save(order=max_order + 1)
 
+class CategoryReorderView(APIView):
+    """Set the navigation order of categories from a list of ids: {"ids": [...]}."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        try:
+            bulk.reorder_categories(request.data.get('ids'))
+        except DjangoValidationError as e:
+            return Response({'detail': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Categories reordered by user: {request.user.username}")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class CategoryTreeView(APIView):
+    """Navigation tree of active categories, served from memory and revalidated with strong ETags."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        body, etag, encoding = category_tree.tree.get(encoding)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(body, content_type='application/json')
+            if encoding is not None:
+                response.headers['Content-Encoding'] = encoding
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'public, no-cache'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -136,8 +207,8 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
             raise serializers.ValidationError("Cannot delete category with associated articles.")
         instance.delete()
         
-class ArticleListCreateView(generics.ListCreateAPIView):
-    queryset = Article.objects.all()
+class ArticleListCreateView(StreamingListMixin, generics.ListCreateAPIView):
+    queryset = Article.objects.select_related('category', 'author').order_by('-publishDate', '-publishTime')
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # Use custom permission class
 
@@ -147,9 +218,25 @@ class ArticleListCreateView(generics.ListCreateAPIView):
             return []
         return [JWTAuthentication()]  # Use rest_framework_simplejwt.authentication.JWTAuthentication
 
+    def omits_content(self):
+        # Listings that only render contentHtml opt out of the raw content with ?omit=content.
+        return self.request.method == 'GET' and self.request.query_params.get('omit') == 'content'
+
+    def get_serializer_class(self):
+        if self.omits_content():
+            return ArticleListSerializer
+        return ArticleSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.omits_content():
+            queryset = queryset.defer('content')
+        return queryset
+
     def perform_create(self, serializer):
         try:
-            serializer.save()
+            article = serializer.save()
+            revisions.record(article, editor=self.request.user)
             logger.info(f"Article created successfully by user: {self.request.user.username}")
         except Exception as e:
             logger.error(f"Article creation failed: {str(e)}")
@@ -167,7 +254,7 @@ class ArticleListCreateView(generics.ListCreateAPIView):
             return Response({'detail': e.detail}, status=status.HTTP_400_BAD_REQUEST)
 
 class ArticleDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Article.objects.all()
+    queryset = Article.objects.select_related('category', 'author')
     serializer_class = ArticleSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # Use custom permission class
 
@@ -179,7 +266,12 @@ class ArticleDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def perform_update(self, serializer):
         try:
-            serializer.save()
+            # One transaction with the article row locked, so concurrent edits can't
+            # interleave between the save and the revision it produces.
+            with transaction.atomic():
+                revisions.ensure_baseline(serializer.instance)
+                serializer.save()
+                revisions.record(serializer.instance, editor=self.request.user)
             logger.info(f"Article {serializer.instance.id} updated by user: {self.request.user.username}")
         except Exception as e:
             logger.error(f"Article update failed: {str(e)}")
@@ -197,6 +289,200 @@ class ArticleDetailView(generics.RetrieveUpdateDestroyAPIView):
             logger.error(f"Article deletion failed: {str(e)}")
             raise
         
+class ArticleRevisionListView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, pk):
+        rows = (ArticleRevision.objects.filter(article_id=pk).order_by('-number').values('number', 'is_snapshot', 'createdAt', 'editor__username', 'fields__title'))
+        return Response([
+            {
+                'number': row['number'],
+                'title': row['fields__title'],
+                'isSnapshot': row['is_snapshot'],
+                'editor': row['editor__username'],
+                'createdAt': row['createdAt'],
+            }
+            for row in rows
+        ], status=status.HTTP_200_OK)
+
+class ArticleRevisionDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request, pk, number):
+        data = revisions.version(pk, number)
+        if data is None:
+            return Response({'detail': 'Revision not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data, status=status.HTTP_200_OK)
+
+class ArticleRevisionRestoreView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request, pk, number):
+        article = get_object_or_404(Article.objects.select_related('category', 'author'), pk=pk)
+        revision = revisions.restore(article, number, editor=request.user)
+        if revision is None:
+            return Response({'detail': 'Revision not found.'}, status=status.HTTP_404_NOT_FOUND)
+        logger.info(f"Article {pk} restored to revision {number} by user: {request.user.username}")
+        return Response(ArticleSerializer(article).data, status=status.HTTP_200_OK)
+
+class ArticleRelatedView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, pk):
+        articles = related.related_for(pk)
+        return Response(ArticleSummarySerializer(articles, many=True).data, status=status.HTTP_200_OK)
+
+class ArticleViewBeaconView(APIView):
+    """
+    Counts one read of an article. Detail pages are served from the proxy
+    cache, so the public site reports views here rather than through GETs.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request, pk):
+        if not Article.objects.filter(pk=pk, status='published').exists():
+            return Response({'detail': 'Article not found.'}, status=status.HTTP_404_NOT_FOUND)
+        trending_engine.record_view(pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class ArticleTrendingView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        lists = trending_engine.lists()
+        ids = {pk for pks in lists.values() for pk in pks}
+        articles = Article.objects.select_related('category').in_bulk(ids)
+        return Response({
+            name: ArticleSummarySerializer([articles[pk] for pk in pks if pk in articles], many=True).data
+            for name, pks in lists.items()
+        }, status=status.HTTP_200_OK)
+
+class ArticleBulkImportView(APIView):
+    """Create many articles from an NDJSON request body (one article object per line)."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        stream = request.stream
+        if stream is None:
+            return Response({'detail': 'Empty request body.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            batch_size = int(request.query_params.get('batch_size', 1000))
+        except ValueError:
+            return Response({'detail': 'batch_size must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created, errors = bulk.import_ndjson(stream, batch_size=max(1, batch_size))
+        except UnicodeDecodeError:
+            return Response({'detail': 'Request body must be UTF-8 encoded NDJSON.'}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Bulk import of {created} articles by user: {request.user.username}")
+        return Response({'created': created, 'errors': errors}, status=status.HTTP_200_OK)
+
+class ArticleBulkUpdateView(APIView):
+    """Apply the same flag or status changes to many articles: {"ids": [...], "changes": {...}}."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        try:
+            updated = bulk.update_articles(request.data.get('ids'), request.data.get('changes'))
+        except DjangoValidationError as e:
+            return Response({'detail': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Bulk update of {updated} articles by user: {request.user.username}")
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+class ArticleExportView(APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        response = StreamingHttpResponse(bulk.export_ndjson(), content_type='application/x-ndjson; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="articles.ndjson"'
+        return response
+
+class TagListView(generics.ListAPIView):
+    serializer_class = TagSerializer
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    pagination_class = ArticleListPagination
+
+    def get_queryset(self):
+        return Tag.objects.filter(articlesCount__gt=0).order_by('-articlesCount', 'name')
+
+class TagArticlesView(generics.ListAPIView):
+    serializer_class = ArticleSummarySerializer
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    pagination_class = ArticleListPagination
+
+    def get_queryset(self):
+        return (Article.objects.filter(tag_rows__name=self.kwargs['name'], status='published')
+                .select_related('category').order_by('-pk'))
+
+class SubcategoryListView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, pk):
+        category = get_object_or_404(Category, pk=pk)
+        return Response(taxonomy.subcategory_counts(category), status=status.HTTP_200_OK)
+
+class SubcategoryArticlesView(generics.ListAPIView):
+    serializer_class = ArticleSummarySerializer
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    pagination_class = ArticleListPagination
+
+    def get_queryset(self):
+        return (Article.objects.filter(category_id=self.kwargs['pk'], subcategory=self.kwargs['name'], status='published')
+                .select_related('category').order_by('-publishDate', '-publishTime'))
+
+class ArchiveCalendarView(APIView):
+    """Published article counts per year, month or day; ``?category=<id>`` narrows to one category."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, year=None, month=None):
+        if (year is not None and not 1 <= year <= 9999) or (month is not None and not 1 <= month <= 12):
+            return Response({'detail': 'Invalid date.'}, status=status.HTTP_404_NOT_FOUND)
+        category = request.query_params.get('category')
+        if category is not None and not category.isdigit():
+            return Response({'detail': 'category must be an id.'}, status=status.HTTP_400_BAD_REQUEST)
+        counts = archive.calendar_counts(year, month, int(category) if category else None)
+        return Response(counts, status=status.HTTP_200_OK)
+
+class ArchiveCursorPagination(CursorPagination):
+    # Keyset pagination: each page continues from the last (publishTime, id) seen,
+    # walking the (status, publishDate, publishTime) indexes.
+    ordering = ('-publishTime', '-id')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'limit'
+
+class ArchiveDayArticlesView(generics.ListAPIView):
+    serializer_class = ArticleSummarySerializer
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    pagination_class = ArchiveCursorPagination
+
+    def get_queryset(self):
+        try:
+            day = date(self.kwargs['year'], self.kwargs['month'], self.kwargs['day'])
+        except ValueError:
+            raise Http404('Invalid date.')
+        articles = Article.objects.filter(status='published', publishDate=day)
+        category = self.request.query_params.get('category')
+        if category is not None:
+            if not category.isdigit():
+                raise serializers.ValidationError({'category': 'category must be an id.'})
+            articles = articles.filter(category_id=int(category))
+        return articles.select_related('category')
+
 class ArticleStatsView(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
@@ -217,9 +503,12 @@ class ArticleStatsView(APIView):
             logger.error(f"Error fetching article stats: {str(e)}")
             return Response({'detail': 'Failed to fetch stats'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class UploadView(APIView):
+class UploadView(LimitedUploadMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
+    throttle_scope = 'upload'
+    upload_kind = 'image'
+    max_upload_size = 5 * 1024 * 1024
 
     def sanitize_filename(self, filename):
         filename = re.sub(r'[^a-zA-Z0-9._-]', '_', filename)
@@ -229,21 +518,20 @@ class UploadView(APIView):
 
     def post(self, request):
         try:
+            # Size and file type are checked by the upload handler while the body streams in
+            rejection = self.upload_rejection(request)
+            if rejection:
+                logger.warning(f"Upload rejected: {rejection[1]}")
+                return Response({'detail': rejection[1]}, status=rejection[0])
             if 'file' not in request.FILES:
                 logger.warning("No file provided in upload request")
                 return Response({'detail': 'No file provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
             file = request.FILES['file']
-            if not file.content_type.startswith('image/'):
-                logger.warning(f"Invalid file type uploaded: {file.content_type}")
-                return Response({'detail': 'Only image files are allowed.'}, status=status.HTTP_400_BAD_REQUEST)
-            if file.size > 5 * 1024 * 1024:
-                logger.warning(f"File size exceeds limit: {file.size} bytes")
-                return Response({'detail': 'File size exceeds 5MB limit.'}, status=status.HTTP_400_BAD_REQUEST)
-
             original_filename = file.name
             sanitized_filename = self.sanitize_filename(original_filename)
-            logger.info(f"Original filename: {original_filename}, Sanitized filename: {sanitized_filename}")
+            logger.info(f"Original filename: {original_filename}, Sanitized filename: {sanitized_filename}, "
+                        f"type: {self.uploaded_content_type(request, 'file')}")
 
             fs = FileSystemStorage(location='media/uploads/')
             filename = fs.save(sanitized_filename, file)
@@ -263,8 +551,8 @@ class VideoCategoryListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
-class VideoListCreateView(generics.ListCreateAPIView):
-    queryset = Video.objects.all()
+class VideoListCreateView(StreamingListMixin, generics.ListCreateAPIView):
+    queryset = Video.objects.order_by('pk')
     serializer_class = VideoSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
@@ -272,6 +560,13 @@ class VideoListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(uploader=self.request.user)
 
+class LiveVideoListView(generics.ListAPIView):
+    """Videos streaming right now, for the public site's live widget."""
+    queryset = Video.objects.filter(is_live=True, status='live').order_by('-live_start_time')
+    serializer_class = VideoSerializer
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
 class VideoDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Video.objects.all()
     serializer_class = VideoSerializer
@@ -301,9 +596,13 @@ class VideoLiveView(generics.UpdateAPIView):
         return Response({'detail': 'No valid action.'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class VideoUploadView(APIView):
+class VideoUploadView(LimitedUploadMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
+    throttle_scope = 'upload'
+    upload_kind = 'video'
+    # 500MB size limit for videos
+    max_upload_size = 500 * 1024 * 1024
 
     def sanitize_filename(self, filename):
         filename = re.sub(r'[^a-zA-Z0-9._-]', '_', filename)
@@ -313,25 +612,21 @@ class VideoUploadView(APIView):
 
     def post(self, request):
         try:
+            # Size and file type are checked by the upload handler while the body streams in
+            rejection = self.upload_rejection(request)
+            if rejection:
+                logger.warning(f"Video upload rejected: {rejection[1]}")
+                return Response({'detail': rejection[1]}, status=rejection[0])
             if 'file' not in request.FILES:
                 logger.warning("No file provided in video upload request")
                 return Response({'detail': 'No file provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
             file = request.FILES['file']
 
-            # Check if the file is a video
-            if not file.content_type.startswith('video/'):
-                logger.warning(f"Invalid file type uploaded: {file.content_type}")
-                return Response({'detail': 'Only video files are allowed.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # 500MB size limit for videos
-            if file.size > 500 * 1024 * 1024:
-                logger.warning(f"Video file size exceeds limit: {file.size} bytes")
-                return Response({'detail': 'Video file size exceeds 500MB limit.'}, status=status.HTTP_400_BAD_REQUEST)
-
             original_filename = file.name
             sanitized_filename = self.sanitize_filename(original_filename)
-            logger.info(f"Original filename: {original_filename}, Sanitized filename: {sanitized_filename}")
+            logger.info(f"Original filename: {original_filename}, Sanitized filename: {sanitized_filename}, "
+                        f"type: {self.uploaded_content_type(request, 'file')}")
 
             # Save videos to 'media/videos/'
             fs = FileSystemStorage(location='media/videos/')
@@ -344,3 +639,10 @@ class VideoUploadView(APIView):
             logger.error(f"Error uploading video: {str(e)}")
             return Response({'detail': f'Video upload failed: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
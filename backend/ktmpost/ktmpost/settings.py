@@ -24,6 +24,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Must be first
+    'accounts.metrics.MetricsMiddleware',
+    'accounts.compression.CompressionMiddleware',
+    'accounts.purge.SurrogateKeyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -36,6 +39,28 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'ktmpost.urls'
 
+# Responses smaller than this many bytes are not compressed
+COMPRESSION_MIN_SIZE = 1024
+
+# Public site, used for links in feeds and sitemaps
+SITE_URL = 'http://localhost:5173'
+SITE_NAME = 'KTM Post'
+
+# Reverse-proxy cache: public responses carry surrogate keys and may be cached by the
+# proxy for SURROGATE_MAX_AGE seconds; changes POST {"keys": [...]} to PURGE_URL.
+# Leave PURGE_URL empty to send no purges.
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+SURROGATE_MAX_AGE = 60 * 60 * 6
+# Article detail and trending responses: their view counts and ranks change without purges.
+SURROGATE_SHORT_MAX_AGE = 60
+PURGE_URL = ''
+PURGE_TOKEN = ''
+PURGE_BATCH_SIZE = 256
+PURGE_TIMEOUT = 2
+
+# Share of requests recorded by accounts.metrics.MetricsMiddleware (0.0 - 1.0)
+METRICS_SAMPLE_RATE = 0.1
+
 
 
 CORS_ALLOW_CREDENTIALS = True  # Allow credentials for JWT authentication
@@ -68,6 +93,15 @@ DATABASES = {
     }
 }
 
+# Use a shared backend (Redis/Memcached) when running more than one worker process,
+# so cache invalidation on article saves reaches every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ktmpost',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -114,8 +148,24 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'accounts.throttling.RateLimitThrottle',
+    ],
+    # Reverse proxies in front of Django. Until this is set, the rate limiter
+    # keys anonymous clients on REMOTE_ADDR and ignores X-Forwarded-For.
+    'NUM_PROXIES': None,
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '600/min',
+        'user': '3000/min',
+        'login': '10/min',
+        'login_username': '30/hour',
+        'upload': '60/min',
+    },
 }
 
+# Set to False to switch off accounts.throttling.RateLimitThrottle (e.g. for benchmarks)
+RATE_LIMIT_ENABLED = True
+
 # settings.py
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')